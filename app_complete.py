@@ -4,40 +4,307 @@ import string
 import random
 import json
 import io
+import logging
 import base64
-import smtplib
+import gzip
+import hashlib
+import math
+import mimetypes
+import sqlite3
 import threading
+import time
 from datetime import datetime, date, timedelta
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, current_app
+from collections import Counter
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, current_app, send_from_directory
+from flask import g, has_request_context, before_render_template, template_rendered
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
-from PIL import Image
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import event, orm
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
 from werkzeug.utils import secure_filename
-import qrcode
+from fragment_cache import LazySequence
+from metrics import (REGISTRY, REQUEST_LATENCY, RESPONSES, REQUEST_QUERIES, SQL_QUERY_LATENCY,
+                     TEMPLATE_RENDER, THROTTLED, CONTENT_TYPE as METRICS_CONTENT_TYPE, timed)
 
 # Excel file location
 EXCEL_FILE_PATH = 'routes and price data.xlsx'
 
+# SQLite engine profiles. Every pragma of the selected profile (SQLITE_PROFILE,
+# default "production") is applied to each new connection. Individual pragmas
+# can be overridden with SQLITE_<PRAGMA>, e.g. SQLITE_BUSY_TIMEOUT=10000; an
+# empty value skips the pragma.
+SQLITE_PROFILES = {
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': '5000',  # milliseconds
+        'cache_size': '-20000',  # negative means KiB, ~20MB per connection
+        'mmap_size': '268435456',  # 256MB
+        'foreign_keys': 'ON',
+        'temp_store': 'MEMORY'
+    },
+    'default': {}
+}
+
+def sqlite_pragmas_from_env():
+    """Return the SQLite pragmas of the configured profile with env overrides"""
+    profile = os.environ.get('SQLITE_PROFILE', 'production')
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE '{profile}'")
+
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name in SQLITE_PROFILES['production']:
+        value = os.environ.get(f'SQLITE_{name.upper()}')
+        if value is not None:
+            pragmas[name] = value
+    return {name: value for name, value in pragmas.items() if value != ''}
+
+def engine_options_from_env():
+    """Return SQLAlchemy engine/pool options set through DB_POOL_* variables"""
+    options = {}
+    for name, env_var in (('pool_size', 'DB_POOL_SIZE'), ('max_overflow', 'DB_MAX_OVERFLOW'),
+                          ('pool_timeout', 'DB_POOL_TIMEOUT'), ('pool_recycle', 'DB_POOL_RECYCLE')):
+        if os.environ.get(env_var):
+            options[name] = int(os.environ[env_var])
+    if os.environ.get('DB_POOL_PRE_PING'):
+        options['pool_pre_ping'] = os.environ['DB_POOL_PRE_PING'].lower() in ('1', 'true', 'yes')
+    return options
+
 app = Flask(__name__)
 
 # Configuration
-app.config['SECRET_KEY'] = secrets.token_hex(16)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///bus_pass_system.db'
+# Set SECRET_KEY in production: sessions and signed pass QR codes must survive restarts
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or secrets.token_hex(16)
+# Key for pass QR signatures (pass_signing.py); derived from SECRET_KEY if unset
+app.config['QR_SIGNING_KEY'] = os.environ.get('QR_SIGNING_KEY')
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///bus_pass_system.db')
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_env()
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLITE_PRAGMAS'] = sqlite_pragmas_from_env()
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Compiled templates persist here across restarts; set JINJA_CACHE_DIR empty to disable
+app.config['JINJA_CACHE_DIR'] = os.environ.get('JINJA_CACHE_DIR', os.path.join(app.instance_path, 'jinja_cache'))
+app.config['WARM_TEMPLATES'] = os.environ.get('WARM_TEMPLATES', '1') == '1'
+# Development SQL detector (query_debug.py): logs repeated query shapes and slow
+# queries with their plan, and adds an X-Query-Debug summary header
+app.config['QUERY_DEBUG'] = os.environ.get('QUERY_DEBUG') == '1'
+app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 100))
+app.config['N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 5))
+# Structured logging (log_config.py), set up by create_app. LOG_SAMPLE_RATES keeps a
+# fraction of DEBUG/INFO records per logger, e.g. "passflow.notifications=0.1"
+app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO')
+app.config['LOG_FORMAT'] = os.environ.get('LOG_FORMAT', 'json')  # json or text
+app.config['LOG_SAMPLE_RATES'] = os.environ.get('LOG_SAMPLE_RATES', '')
+# Login/registration throttling (throttle.py); bucket state is a SQLite file
+# shared by every worker on the host
+app.config['THROTTLE_ENABLED'] = os.environ.get('THROTTLE_ENABLED', '1') == '1'
+app.config['THROTTLE_DB'] = os.environ.get('THROTTLE_DB', os.path.join(app.instance_path, 'throttle.db'))
+# /metrics totals of all workers on the host (metrics.py), summed in this SQLite
+# file by create_app; set METRICS_DB empty to report each worker on its own
+app.config['METRICS_DB'] = os.environ.get('METRICS_DB', os.path.join(app.instance_path, 'metrics.db'))
+# Reverse proxies in front of the app (e.g. 1 behind a platform router). When
+# set, create_app trusts that many X-Forwarded-For/-Proto hops, so throttling
+# sees client addresses rather than the proxy's. Leave 0 when clients connect directly.
+app.config['TRUSTED_PROXIES'] = int(os.environ.get('TRUSTED_PROXIES', 0))
+
+notifications_logger = logging.getLogger('passflow.notifications')
+alerts_logger = logging.getLogger('passflow.alerts')
+images_logger = logging.getLogger('passflow.images')
+
+# Import jobs without a progress update for this long are treated as abandoned
+IMPORT_JOB_STALE_AFTER = timedelta(minutes=10)
+# Report written routes/prices (and refresh the job heartbeat) every this many changes
+IMPORT_PROGRESS_EVERY = 100
+
+# On-the-fly compression of dynamic responses at least this large (bytes)
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_MIMETYPES = {'text/html', 'text/css', 'text/plain', 'application/json',
+                      'application/javascript', 'application/geo+json', 'image/svg+xml'}
+
+# Token buckets as (burst, refills per minute), per client IP and per account email.
+# A whole campus can share one NAT address at semester start, so the IP buckets
+# only stop floods; the account bucket is what protects passwords
+THROTTLE_LIMITS = {
+    'login': {'ip': (60, 60), 'account': (5, 1)},
+    'register': {'ip': (30, 30)}
+}
+
+# Most scanned pass payloads accepted by one /api/passes/verify call
+VERIFY_BATCH_LIMIT = 500
+
+# Revocation lists (revocation.py) for offline scanners. A new version is stored
+# when the revoked set changes, checked at most every REVOCATION_REFRESH; passes
+# that expired more than REVOCATION_RETENTION ago drop out, since their signed
+# expiry date already fails verification. Each worker looks for a version
+# published elsewhere at most every REVOCATION_VERSION_CHECK.
+REVOCATION_REFRESH = timedelta(minutes=5)
+REVOCATION_VERSION_CHECK = timedelta(seconds=5)
+REVOCATION_RETENTION = timedelta(days=30)
+REVOCATION_KEEP_VERSIONS = 200
+
+# Douglas-Peucker tolerance (degrees, ~100m) for the low-zoom route GeoJSON
+LOW_ZOOM_TOLERANCE = 0.001
+
+class TimedBcrypt(Bcrypt):
+    """Bcrypt that records hashing and checking time in the metrics"""
+
+    def generate_password_hash(self, password, rounds=None, prefix=None):
+        with timed('bcrypt_hash'):
+            return super().generate_password_hash(password, rounds, prefix)
+
+    def check_password_hash(self, pw_hash, password):
+        with timed('bcrypt_check'):
+            return super().check_password_hash(pw_hash, password)
 
 # Initialize extensions
 db = SQLAlchemy(app)
-bcrypt = Bcrypt(app)
+bcrypt = TimedBcrypt(app)
+
+@event.listens_for(Engine, 'connect')
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    """Apply the SQLite engine profile to every new connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in app.config['SQLITE_PRAGMAS'].items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+    cursor.close()
+
+# Request metrics, exposed at /metrics
+def metrics_endpoint():
+    return (request.endpoint or 'unmatched') if has_request_context() else 'background'
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    if has_request_context():
+        g.sql_queries = g.get('sql_queries', 0) + 1
+        tracker = g.get('query_tracker')
+        if tracker is not None:
+            tracker.record(conn.connection.dbapi_connection, statement, parameters, elapsed, executemany)
+    SQL_QUERY_LATENCY.observe(elapsed, metrics_endpoint())
+
+@event.listens_for(Engine, 'handle_error')
+def discard_query_timer(context):
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+@before_render_template.connect_via(app)
+def start_template_timer(sender, template, context, **extra):
+    g.setdefault('template_started', []).append(time.perf_counter())
+
+@template_rendered.connect_via(app)
+def record_template(sender, template, context, **extra):
+    TEMPLATE_RENDER.observe(time.perf_counter() - g.template_started.pop(), template.name)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    REGISTRY.start_flusher()
+
+@app.after_request
+def record_response_status(response):
+    g.response_status = response.status_code
+    return response
+
+@app.before_request
+def start_query_tracker():
+    if app.config['QUERY_DEBUG']:
+        from query_debug import QueryTracker
+        g.query_tracker = QueryTracker(app.config['SLOW_QUERY_MS'], app.config['N_PLUS_ONE_THRESHOLD'])
+
+@app.after_request
+def report_query_tracker(response):
+    tracker = g.pop('query_tracker', None)
+    if tracker is not None:
+        response.headers['X-Query-Debug'] = tracker.report(metrics_endpoint())
+    return response
+
+@app.teardown_request
+def record_request(exc):
+    started = g.pop('request_started', None)
+    if started is None:
+        return
+    endpoint = metrics_endpoint()
+    REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint, request.method)
+    RESPONSES.inc(endpoint, str(g.pop('response_status', 500)))
+    REQUEST_QUERIES.observe(g.pop('sql_queries', 0), endpoint)
+
+# Fragment cache for catalog-heavy templates, invalidated by the catalog version
+app.jinja_env.add_extension('fragment_cache.FragmentCacheExtension')
+app.jinja_env.fragment_cache.maxsize = int(os.environ.get('FRAGMENT_CACHE_SIZE', 128))
+app.jinja_env.fragment_cache_version = lambda: get_catalog_version()
 
 # Template context
 @app.context_processor
 def inject_datetime():
     return {'datetime': datetime, 'date': date}
 
+_asset_manifest = None
+
+def get_asset_manifest():
+    """Return the vendored asset manifest, read once per worker"""
+    global _asset_manifest
+    if _asset_manifest is None:
+        from vendor_assets import load_manifest
+        _asset_manifest = load_manifest()
+    return _asset_manifest
+
+@app.template_global()
+def asset_url(name):
+    """URL of a third-party asset: the vendored, fingerprinted copy if present, else its CDN URL"""
+    from vendor_assets import ASSETS
+
+    manifest = get_asset_manifest()
+    if name in manifest:
+        return url_for('vendor_asset', filename=manifest[name])
+    return ASSETS[name]
+
+def accepted_encodings():
+    """Content encodings the client accepts, preferred first"""
+    return [encoding for encoding in ('br', 'gzip') if request.accept_encodings.quality(encoding) > 0]
+
+@app.after_request
+def compress_response(response):
+    """Compress large text responses on the fly (brotli if installed, else gzip)"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+
+    for encoding in accepted_encodings():
+        if encoding == 'br':
+            try:
+                import brotli
+            except ImportError:
+                continue
+            compressed = brotli.compress(body, quality=5)
+        else:
+            compressed = gzip.compress(body, compresslevel=6)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # Weak validators may be shared across encodings, strong ones may not
+            response.set_etag(f'{etag}-{encoding}')
+        break
+    response.vary.add('Accept-Encoding')
+    return response
+
 # Models
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -45,7 +312,7 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     phone = db.Column(db.String(15), nullable=False)
     password = db.Column(db.String(255), nullable=False)
-    role = db.Column(db.String(20), default='student')  # student or admin
+    role = db.Column(db.String(20), default='student', index=True)  # student or admin
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -55,7 +322,7 @@ class User(db.Model):
 
 class Profile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     prn = db.Column(db.String(20), unique=True)
     pass_no = db.Column(db.String(20), unique=True)
     photo = db.Column(db.String(200))
@@ -109,34 +376,47 @@ class Pricing(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Pass(db.Model):
+    __table_args__ = (
+        db.Index('ix_pass_status_created_at', 'status', 'created_at'),
+        db.Index('ix_pass_expiry_date_status', 'expiry_date', 'status'),
+        db.Index('ix_pass_status_expiry_date', 'status', 'expiry_date'),
+        db.Index('ix_pass_user_id_created_at', 'user_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     route_id = db.Column(db.Integer, db.ForeignKey('route.id'), nullable=False)
     amount_paid = db.Column(db.Float, nullable=False)
     issue_date = db.Column(db.Date, default=datetime.utcnow().date)
     expiry_date = db.Column(db.Date, nullable=False)
-    status = db.Column(db.String(20), default='Pending')  # Pending, Approved, Rejected
+    status = db.Column(db.String(20), default='Pending')  # Pending, Approved, Rejected, Expired (see expire_passes)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     payment = db.relationship('Payment', backref='bus_pass', uselist=False)
 
 class Payment(db.Model):
+    __table_args__ = (
+        db.Index('uq_payment_idempotency_key', 'idempotency_key', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    pass_id = db.Column(db.Integer, db.ForeignKey('pass.id'), nullable=False)
+    pass_id = db.Column(db.Integer, db.ForeignKey('pass.id'), nullable=False, index=True)
     amount = db.Column(db.Float, nullable=False)
     payment_method = db.Column(db.String(50), default='Mock Payment')
     transaction_id = db.Column(db.String(100), unique=True)
+    idempotency_key = db.Column(db.String(64))  # Issued by payment_gateway, unique per purchase
     status = db.Column(db.String(20), default='Completed')  # Completed, Failed
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     def generate_transaction_id(self):
-        """Generate unique transaction ID"""
-        while True:
-            trans_id = 'TXN' + ''.join(random.choices(string.ascii_uppercase + string.digits, k=12))
-            if not Payment.query.filter_by(transaction_id=trans_id).first():
-                return trans_id
+        """Generate unique transaction ID.
+
+        Drawn from 36^12 values with a CSPRNG, so no lookup is needed; the
+        unique constraint on transaction_id backs it up.
+        """
+        return 'TXN' + ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(12))
 
 class AlertConfiguration(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -149,6 +429,10 @@ class AlertConfiguration(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class NotificationLog(db.Model):
+    __table_args__ = (
+        db.Index('ix_notification_log_pass_id_alert_config_id', 'pass_id', 'alert_config_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     pass_id = db.Column(db.Integer, db.ForeignKey('pass.id'), nullable=False)
@@ -159,14 +443,111 @@ class NotificationLog(db.Model):
     status = db.Column(db.String(20), default='pending')  # pending, sent, failed
     error_message = db.Column(db.Text)
     sent_at = db.Column(db.DateTime)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     # Relationships
     user = db.relationship('User', backref='notifications')
     bus_pass = db.relationship('Pass', backref='notifications')
     alert_config = db.relationship('AlertConfiguration', backref='notifications')
 
+class ImportJob(db.Model):
+    LOCK = 'catalog-import'
+
+    id = db.Column(db.Integer, primary_key=True)
+    dry_run = db.Column(db.Boolean, default=False)
+    force = db.Column(db.Boolean, default=False)
+    status = db.Column(db.String(20), default='queued')  # queued, running, completed, failed
+    phase = db.Column(db.String(20))  # fingerprint, parsing, applying
+    active_lock = db.Column(db.String(20), unique=True)  # Set while queued/running, NULL once finished
+    rows_parsed = db.Column(db.Integer, default=0)
+    routes_written = db.Column(db.Integer, default=0)
+    prices_written = db.Column(db.Integer, default=0)
+    report = db.Column(db.Text)  # JSON import report
+    error_message = db.Column(db.Text)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def get_report(self):
+        """Return the import report as Python dict"""
+        return json.loads(self.report) if self.report else None
+
+    def set_report(self, report_dict):
+        """Set the import report from Python dict"""
+        self.report = json.dumps(report_dict)
+
+    def to_dict(self):
+        """Return the job progress as a JSON-serializable dict"""
+        if self.started_at:
+            elapsed = ((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds()
+        else:
+            elapsed = 0
+        return {
+            'id': self.id,
+            'dry_run': self.dry_run,
+            'status': self.status,
+            'phase': self.phase,
+            'rows_parsed': self.rows_parsed,
+            'routes_written': self.routes_written,
+            'prices_written': self.prices_written,
+            'elapsed_seconds': round(elapsed, 3),
+            'error': self.error_message,
+            'report': self.get_report()
+        }
+
+class DataImport(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    workbook_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of the imported workbook
+    routes_added = db.Column(db.Integer, default=0)
+    routes_updated = db.Column(db.Integer, default=0)
+    routes_removed = db.Column(db.Integer, default=0)
+    pricing_added = db.Column(db.Integer, default=0)
+    pricing_updated = db.Column(db.Integer, default=0)
+    pricing_removed = db.Column(db.Integer, default=0)
+    duration_ms = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class CatalogVersion(db.Model):
+    id = db.Column(db.Integer, primary_key=True)  # Single row with id 1
+    version = db.Column(db.Integer, nullable=False, default=0)  # Bumped on every route/pricing change
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class RevocationList(db.Model):
+    version = db.Column(db.Integer, primary_key=True)
+    ids = db.Column(db.LargeBinary, nullable=False)  # Revoked pass ids, revocation.encode_ids
+    count = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    checked_at = db.Column(db.DateTime, default=datetime.utcnow)  # Last refresh that found no change
+
+@event.listens_for(orm.Session, 'before_flush')
+def bump_catalog_version(session, flush_context, instances):
+    """Bump the catalog version in the same transaction as any route or pricing change"""
+    changed = any(
+        isinstance(obj, (Route, Pricing))
+        for obj in list(session.new) + list(session.deleted)
+    ) or any(
+        isinstance(obj, (Route, Pricing)) and session.is_modified(obj)
+        for obj in session.dirty
+    )
+    if changed:
+        increment_catalog_version(session)
+
+def increment_catalog_version(session):
+    """Bump the catalog version; bulk loaders that bypass the ORM call this directly"""
+    result = session.execute(
+        db.update(CatalogVersion)
+        .where(CatalogVersion.id == 1)
+        .values(version=CatalogVersion.version + 1, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        session.add(CatalogVersion(id=1, version=1))
+
 # Utility functions
+def get_catalog_version():
+    """Return the current route/pricing data version"""
+    return db.session.query(CatalogVersion.version).filter_by(id=1).scalar() or 0
+
 def login_required(f):
     """Decorator to require login"""
     def decorated_function(*args, **kwargs):
@@ -192,23 +573,206 @@ def admin_required(f):
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+def bearer_token_or_admin(env_var):
+    """True if the request presents the bearer token configured in env_var
+    (no database access), or comes from a logged-in admin"""
+    token = os.environ.get(env_var)
+    if token and secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    user = User.query.get(session['user_id']) if 'user_id' in session else None
+    return bool(user and user.role == 'admin')
+
+_pass_signer = None
+
+def get_pass_signer():
+    """PassSigner for QR payloads, created once per worker"""
+    global _pass_signer
+    if _pass_signer is None:
+        from pass_signing import PassSigner, derive_key
+        key = app.config['QR_SIGNING_KEY']
+        _pass_signer = PassSigner(key.encode('utf-8') if key else derive_key(app.config['SECRET_KEY']))
+    return _pass_signer
+
+def pass_qr_payload(bus_pass):
+    """Signed QR payload for a pass"""
+    profile = bus_pass.user.profile
+    return get_pass_signer().sign(bus_pass.id, profile.pass_no if profile else None,
+                                  bus_pass.expiry_date, bus_pass.status)
+
+def revoked_pass_ids(today=None):
+    """Sorted ids of passes a scanner must refuse: rejected, or past their expiry
+    date, leaving out those that expired more than REVOCATION_RETENTION ago"""
+    today = today or date.today()
+    rows = db.session.query(Pass.id).filter(
+        Pass.expiry_date >= today - REVOCATION_RETENTION,
+        db.or_(Pass.status == 'Rejected', Pass.expiry_date < today)
+    ).order_by(Pass.id)
+    return [pass_id for (pass_id,) in rows]
+
+def refresh_revocation_list(force=False):
+    """Return the latest RevocationList, first storing a new version if the
+    revoked set changed and the last check is older than REVOCATION_REFRESH"""
+    from revocation import encode_ids
+    latest = RevocationList.query.order_by(RevocationList.version.desc()).first()
+    now = datetime.utcnow()
+    if latest and not force and now - latest.checked_at < REVOCATION_REFRESH:
+        return latest
+
+    ids = revoked_pass_ids()
+    encoded = encode_ids(ids)
+    if latest and latest.ids == encoded:
+        latest.checked_at = now
+    else:
+        version = latest.version + 1 if latest else 1
+        latest = RevocationList(version=version, ids=encoded, count=len(ids), created_at=now, checked_at=now)
+        db.session.add(latest)
+        RevocationList.query.filter(RevocationList.version <= version - REVOCATION_KEEP_VERSIONS).delete()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker stored this version first
+        db.session.rollback()
+        latest = RevocationList.query.order_by(RevocationList.version.desc()).first()
+    return latest
+
+_revoked = None  # (loaded at, version checked at, version, sorted revoked pass ids) for this worker
+
+def get_revoked_pass_ids():
+    """Revoked pass ids for verify_passes.
+
+    The cached version is compared with the latest stored one (a
+    primary-key lookup) at most every REVOCATION_VERSION_CHECK, so a version
+    published by any worker is seen within that window; the list itself is
+    decoded only when the version moves, and refreshed from the passes
+    every REVOCATION_REFRESH.
+    """
+    global _revoked
+    from revocation import decode_ids
+    now = time.monotonic()
+    if _revoked is None or now - _revoked[0] > REVOCATION_REFRESH.total_seconds():
+        latest = refresh_revocation_list()
+        _revoked = (now, now, latest.version, decode_ids(latest.ids))
+    elif now - _revoked[1] > REVOCATION_VERSION_CHECK.total_seconds():
+        version = db.session.query(db.func.max(RevocationList.version)).scalar()
+        if version == _revoked[2]:
+            _revoked = (_revoked[0], now, version, _revoked[3])
+        else:
+            latest = RevocationList.query.order_by(RevocationList.version.desc()).first()
+            _revoked = (_revoked[0], now, latest.version, decode_ids(latest.ids))
+    return _revoked[3]
+
+def publish_revocations():
+    """Store a new revocation list version now rather than at the next refresh;
+    every worker's get_revoked_pass_ids picks it up within REVOCATION_VERSION_CHECK"""
+    refresh_revocation_list(force=True)
+
+_throttle = None
+
+def throttle_response(action, account=None):
+    """Take a token for a login/registration attempt.
+
+    Returns a 429 response to send instead when the client IP or the
+    account is out of tokens, else None. Runs before any bcrypt work.
+    """
+    global _throttle
+    if not app.config['THROTTLE_ENABLED']:
+        return None
+    if _throttle is None:
+        from throttle import TokenBucketLimiter
+        _throttle = TokenBucketLimiter(app.config['THROTTLE_DB'])
+
+    subjects = {'ip': request.remote_addr, 'account': (account or '').strip().lower()}
+    limits = [(f'{action}:{scope}:{subjects[scope]}', burst, per_minute / 60)
+              for scope, (burst, per_minute) in THROTTLE_LIMITS[action].items() if subjects[scope]]
+    key, retry_after = _throttle.take(limits)
+    if key is None:
+        return None
+
+    THROTTLED.inc(action, key.split(':')[1])
+    retry_after = math.ceil(retry_after)
+    flash(f'Too many attempts. Please try again in {retry_after} seconds.', 'danger')
+    return render_template(f'{action}.html'), 429, {'Retry-After': str(retry_after)}
+
+@timed('image_resize')
 def resize_image(filepath, max_size=(600, 600)):
     """Resize image to maximum dimensions"""
+    from PIL import Image
+
     try:
         with Image.open(filepath) as img:
             img.thumbnail(max_size, Image.Resampling.LANCZOS)
             img.save(filepath, optimize=True, quality=85)
     except Exception as e:
-        print(f"Error resizing image: {e}")
+        images_logger.warning('Image resize failed', extra={'path': filepath, 'error': str(e)})
 
 def is_pass_expired(bus_pass):
-    """Check if a pass is expired"""
-    return date.today() > bus_pass.expiry_date
+    """Check if a pass is expired (by date too, until the nightly sweep has run)"""
+    return bus_pass.status == 'Expired' or date.today() > bus_pass.expiry_date
 
 def get_days_until_expiry(bus_pass):
     """Get number of days until pass expires"""
     return (bus_pass.expiry_date - date.today()).days
 
+def pass_page_etag(pass_id, page):
+    """Weak ETag for a pass page built from the values it displays.
+
+    One indexed query instead of loading the pass, user, profile, route and
+    payment. Returns None if the pass does not exist or the current user
+    may not see it, so the view takes its normal path.
+    """
+    row = db.session.query(
+        Pass.user_id, Pass.status, Pass.issue_date, Pass.expiry_date, Pass.amount_paid, Pass.route_id,
+        User.name, User.phone, Profile.prn, Profile.pass_no, Profile.photo, Profile.location,
+        Profile.semester, Profile.bus_number
+    ).join(User, Pass.user_id == User.id).outerjoin(Profile, Profile.user_id == User.id).filter(Pass.id == pass_id).first()
+    if row is None:
+        return None
+
+    viewer_id = session['user_id']
+    if row.user_id != viewer_id:
+        viewer = db.session.get(User, viewer_id)
+        if not viewer or viewer.role != 'admin':
+            return None
+
+    # Today's date covers the expiry countdown, the catalog version route renames,
+    # the signed QR payload the signing key and payload format
+    qr_payload = get_pass_signer().sign(pass_id, row.pass_no, row.expiry_date, row.status)
+    parts = (page, pass_id, viewer_id, session.get('user_name'), tuple(row), date.today(), get_catalog_version(),
+             qr_payload)
+    return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()[:32]
+
+def pass_page_not_modified(etag):
+    """Return a 304 response if the client already has the page for etag, else None"""
+    # Pending flash messages are rendered into the page, so they need a full response
+    if etag is None or '_flashes' in session or not request.if_none_match.contains_weak(etag):
+        return None
+    response = app.response_class(status=304)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def with_pass_page_etag(body, etag):
+    """Wrap a rendered pass page in a response carrying its validator"""
+    response = app.make_response(body)
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@timed('qr_code')
+def make_qr_data_url(data, box_size=8, border=2):
+    """Return a QR code for data as a PNG data: URL"""
+    import qrcode
+
+    qr = qrcode.QRCode(version=1, box_size=box_size, border=border)
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    img_io = io.BytesIO()
+    img.save(img_io, 'PNG')
+    return f"data:image/png;base64,{base64.b64encode(img_io.getvalue()).decode('utf-8')}"
+
 def format_template(template, user, bus_pass):
     """Format notification template with user and pass data"""
     days_until_expiry = get_days_until_expiry(bus_pass)
@@ -236,10 +800,8 @@ def send_email_notification(to_email, subject, message):
     """Send email notification (mock implementation)"""
     try:
         # Mock email sending - in production, use actual SMTP settings
-        print(f"EMAIL SENT TO: {to_email}")
-        print(f"SUBJECT: {subject}")
-        print(f"MESSAGE: {message}")
-        print("-" * 50)
+        notifications_logger.info('Email sent', extra={'channel': 'email', 'recipient': to_email, 'subject': subject})
+        notifications_logger.debug('Email body', extra={'channel': 'email', 'recipient': to_email, 'body': message})
         return True, None
     except Exception as e:
         return False, str(e)
@@ -260,12 +822,12 @@ def send_sms_notification(to_phone, message):
                 client.messages.create(body=message, from_=from_number, to=to_phone)
                 return True, None
             except Exception as twilio_err:
-                # Fallback to console if Twilio fails
-                print(f"Twilio send failed: {twilio_err}. Falling back to console log.")
+                # Fallback to the mock if Twilio fails
+                notifications_logger.warning('Twilio send failed, using mock SMS',
+                                             extra={'channel': 'sms', 'recipient': to_phone, 'error': str(twilio_err)})
         # Fallback mock
-        print(f"SMS SENT TO: {to_phone}")
-        print(f"MESSAGE: {message}")
-        print("-" * 50)
+        notifications_logger.info('SMS sent', extra={'channel': 'sms', 'recipient': to_phone})
+        notifications_logger.debug('SMS body', extra={'channel': 'sms', 'recipient': to_phone, 'body': message})
         return True, None
     except Exception as e:
         return False, str(e)
@@ -282,8 +844,11 @@ def create_notification_log(user_id, pass_id, alert_config_id, notification_type
     )
     return notification
 
+@timed('expiry_alerts')
 def send_expiry_alerts():
     """Check for passes that need expiry alerts and send them"""
+    started = time.perf_counter()
+    sent = failed = 0
     try:
         with app.app_context():
             # Get active alert configurations
@@ -294,22 +859,25 @@ def send_expiry_alerts():
                 target_date = date.today() + timedelta(days=config.days_before)
                 
                 # Get passes expiring on target date that haven't received this alert yet
-                passes_to_alert = Pass.query.filter(
+                passes_to_alert = Pass.query.options(
+                    joinedload(Pass.user).joinedload(User.profile),
+                    joinedload(Pass.route)
+                ).filter(
                     Pass.expiry_date == target_date,
                     Pass.status == 'Approved'
                 ).all()
                 
+                # Passes that already received this alert, in one query
+                already_sent = {pass_id for (pass_id,) in db.session.query(NotificationLog.pass_id).filter(
+                    NotificationLog.pass_id.in_([bus_pass.id for bus_pass in passes_to_alert]),
+                    NotificationLog.alert_config_id == config.id,
+                    NotificationLog.status == 'sent'
+                )} if passes_to_alert else set()
+                
                 for bus_pass in passes_to_alert:
                     user = bus_pass.user
                     
-                    # Check if alert already sent for this pass and config
-                    existing_log = NotificationLog.query.filter_by(
-                        pass_id=bus_pass.id,
-                        alert_config_id=config.id,
-                        status='sent'
-                    ).first()
-                    
-                    if existing_log:
+                    if bus_pass.id in already_sent:
                         continue  # Already sent
                     
                     # Send email notification
@@ -351,25 +919,471 @@ def send_expiry_alerts():
                         sms_log.error_message = sms_error
                     
                     db.session.add(sms_log)
+                    sent += email_success + sms_success
+                    failed += (not email_success) + (not sms_success)
                     
             db.session.commit()
-            print(f"Expiry alerts check completed at {datetime.now()}")
+            alerts_logger.info('Expiry alerts check completed', extra={
+                'sent': sent, 'failed': failed, 'duration_ms': round((time.perf_counter() - started) * 1000, 1)})
             
-    except Exception as e:
-        print(f"Error sending expiry alerts: {e}")
+    except Exception:
+        alerts_logger.exception('Error sending expiry alerts')
+
+@timed('expiry_sweep')
+def expire_passes(today=None):
+    """Mark Approved passes past their expiry date as Expired.
+
+    One set-based UPDATE over ix_pass_status_expiry_date, so status alone
+    tells active passes from dead ones. Returns the number of passes
+    expired, or None if the sweep failed.
+    """
+    started = time.perf_counter()
+    try:
+        with app.app_context():
+            result = db.session.execute(
+                db.update(Pass)
+                .where(Pass.expiry_date < (today or date.today()), Pass.status == 'Approved')
+                .values(status='Expired')
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            alerts_logger.info('Expiry sweep completed', extra={
+                'expired': result.rowcount, 'duration_ms': round((time.perf_counter() - started) * 1000, 1)})
+            return result.rowcount
+    except Exception:
+        alerts_logger.exception('Error expiring passes')
+        return None
 
 def start_alert_scheduler():
-    """Start background thread for checking expiry alerts"""
+    """Start background thread for the nightly expiry sweep and expiry alerts"""
     def run_scheduler():
         import time
+        last_sweep = None
         while True:
+            # The first check after midnight expires the passes that ended yesterday
+            if last_sweep != date.today():
+                last_sweep = date.today()
+                expire_passes(last_sweep)
             send_expiry_alerts()
             # Check every hour (3600 seconds)
             time.sleep(3600)
     
     scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
     scheduler_thread.start()
-    print("Alert scheduler started")
+    alerts_logger.info('Alert scheduler started')
+
+def simplify_line(points, tolerance):
+    """Simplify a list of [lng, lat] points with the Douglas-Peucker algorithm"""
+    if len(points) < 3:
+        return points
+
+    (x1, y1), (x2, y2) = points[0], points[-1]
+    dx, dy = x2 - x1, y2 - y1
+    length = math.hypot(dx, dy)
+    max_distance, split = 0, 0
+    for i in range(1, len(points) - 1):
+        px, py = points[i]
+        if length == 0:
+            distance = math.hypot(px - x1, py - y1)
+        else:
+            distance = abs(dy * px - dx * py + x2 * y1 - y2 * x1) / length
+        if distance > max_distance:
+            max_distance, split = distance, i
+
+    if max_distance <= tolerance:
+        return [points[0], points[-1]]
+    return simplify_line(points[:split + 1], tolerance)[:-1] + simplify_line(points[split:], tolerance)
+
+def build_routes_geojson(routes, detail='full'):
+    """Return routes as a GeoJSON FeatureCollection.
+
+    The full variant has one coordinate per stop, in stop order, with stop
+    names in the ``stops`` property. The low-zoom variant only carries the
+    simplified route line.
+    """
+    features = []
+    for route in routes:
+        stops = route.get_stops()
+        if not stops:
+            continue
+
+        properties = {'id': route.id, 'name': route.name, 'bus_number': route.bus_number}
+        if detail == 'low':
+            coordinates = simplify_line([[round(stop['lng'], 4), round(stop['lat'], 4)] for stop in stops],
+                                        LOW_ZOOM_TOLERANCE)
+        else:
+            coordinates = [[stop['lng'], stop['lat']] for stop in stops]
+            properties['stops'] = [stop['name'] for stop in stops]
+            properties['timings'] = route.get_timings()
+
+        if len(coordinates) == 1:
+            geometry = {'type': 'Point', 'coordinates': coordinates[0]}
+        else:
+            geometry = {'type': 'LineString', 'coordinates': coordinates}
+        features.append({'type': 'Feature', 'geometry': geometry, 'properties': properties})
+
+    return {'type': 'FeatureCollection', 'features': features}
+
+# Data derived from the route/pricing catalog, per worker: {name: (catalog version, value)}
+_catalog_cache = {}
+
+def get_catalog_cached(name, build):
+    """Return build() for the current catalog version, rebuilding it after catalog changes"""
+    version = get_catalog_version()
+    cached = _catalog_cache.get(name)
+    if cached is None or cached[0] != version:
+        cached = (version, build())
+        _catalog_cache[name] = cached
+    return cached[1]
+
+def encode_json_document(document):
+    """Return (etag, body, gzipped body) of a JSON document for cached_json_response"""
+    body = json.dumps(document, separators=(',', ':')).encode('utf-8')
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    return etag, body, gzip.compress(body, mtime=0)
+
+def cached_json_response(encoded, mimetype='application/json', cache_control='private, no-cache'):
+    """Serve an encode_json_document result, gzipped when accepted, answering If-None-Match with 304"""
+    etag, body, gzipped = encoded
+
+    use_gzip = request.accept_encodings.quality('gzip') > 0
+    if use_gzip:
+        etag += '-gz'  # Strong ETags differ per content encoding
+
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(gzipped if use_gzip else body, mimetype=mimetype)
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response
+
+def get_routes_geojson(detail='full'):
+    """Return the encoded route GeoJSON for the current catalog version"""
+    return get_catalog_cached(f'routes_geojson:{detail}',
+                              lambda: encode_json_document(build_routes_geojson(Route.query.all(), detail)))
+
+def build_location_catalog(routes, prices, version):
+    """Return the compact location catalog used by the create pass page.
+
+    ``locations`` maps each priced location to [price, [route ids]] and
+    ``routes`` maps route ids to [name, bus number, [stop names]].
+    """
+    catalog_routes = {}
+    route_ids = {location: [] for location in prices}
+    for route in routes:
+        stop_names = [stop['name'] for stop in route.get_stops()]
+        catalog_routes[route.id] = [route.name, route.bus_number, stop_names]
+        for name in dict.fromkeys(stop_names):
+            if name in route_ids:
+                route_ids[name].append(route.id)
+
+    return {
+        'version': version,
+        'locations': {location: [price, route_ids[location]] for location, price in prices.items()},
+        'routes': catalog_routes
+    }
+
+def get_location_catalog():
+    """Return the encoded location catalog for the current catalog version"""
+    def build():
+        prices = dict(db.session.query(Pricing.location, Pricing.price).order_by(Pricing.location))
+        routes = Route.query.order_by(Route.name).all()
+        return encode_json_document(build_location_catalog(routes, prices, get_catalog_version()))
+
+    return get_catalog_cached('location_catalog', build)
+
+def get_stop_index():
+    """Return the nearest-stop index over all route stops"""
+    from catalog_index import StopIndex, collect_stops
+
+    def build():
+        routes = [{'id': route.id, 'name': route.name, 'bus_number': route.bus_number, 'stops': route.get_stops()}
+                  for route in Route.query.all()]
+        prices = dict(db.session.query(Pricing.location, Pricing.price).all())
+        return StopIndex(collect_stops(routes, prices))
+
+    return get_catalog_cached('stop_index', build)
+
+def get_location_index():
+    """Return the autocomplete index over pricing locations and stop names"""
+    from catalog_index import LocationIndex
+
+    def build():
+        entries = [{'location': location, 'price': price}
+                   for location, price in db.session.query(Pricing.location, Pricing.price).order_by(Pricing.location)]
+        for route in Route.query.all():
+            entries.extend({'location': stop['name'], 'price': None} for stop in route.get_stops())
+        return LocationIndex(entries)
+
+    return get_catalog_cached('location_index', build)
+
+def diff_catalog(parsed):
+    """Compare parsed workbook routes/pricing with the database.
+
+    Routes are matched by name and pricing by location. Routes that are no
+    longer in the workbook but are still referenced by a pass or profile are
+    retained instead of removed. A workbook naming the same route twice is
+    rejected with ValueError rather than collapsing the two into one.
+    """
+    names = Counter(route_data['name'] for route_data in parsed['routes'])
+    duplicates = sorted(name for name, count in names.items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Duplicate route names in workbook: {', '.join(duplicates)}")
+
+    # Extra database rows sharing a name are left unmatched, so they are
+    # removed or retained like any route missing from the workbook
+    existing_routes = {}
+    unmatched_routes = []
+    for route in Route.query.order_by(Route.id):
+        if route.name in existing_routes:
+            unmatched_routes.append(route)
+        else:
+            existing_routes[route.name] = route
+    existing_pricing = {p.location: p for p in Pricing.query.all()}
+
+    diff = {
+        'routes_add': [], 'routes_update': [], 'routes_remove': [], 'routes_retained': [],
+        'pricing_add': [], 'pricing_update': [], 'pricing_remove': []
+    }
+
+    for route_data in parsed['routes']:
+        route = existing_routes.pop(route_data['name'], None)
+        if route is None:
+            diff['routes_add'].append(route_data)
+        elif route.bus_number != route_data['bus_number'] or route.get_stops() != route_data['stops']:
+            diff['routes_update'].append((route, route_data))
+
+    unmatched_routes.extend(existing_routes.values())
+    if unmatched_routes:
+        in_use = {route_id for (route_id,) in db.session.query(Pass.route_id).distinct()}
+        in_use.update(route_id for (route_id,) in db.session.query(Profile.route_id).distinct())
+        for route in unmatched_routes:
+            if route.id in in_use:
+                diff['routes_retained'].append(route)
+            else:
+                diff['routes_remove'].append(route)
+
+    for location, price in parsed['pricing'].items():
+        pricing = existing_pricing.pop(location, None)
+        if pricing is None:
+            diff['pricing_add'].append((location, price))
+        elif pricing.price != price:
+            diff['pricing_update'].append((pricing, price))
+    diff['pricing_remove'] = list(existing_pricing.values())
+
+    return diff
+
+def summarize_catalog_diff(diff):
+    """Return the per-table change counts of a catalog diff"""
+    return {
+        'routes_added': len(diff['routes_add']),
+        'routes_updated': len(diff['routes_update']),
+        'routes_removed': len(diff['routes_remove']),
+        'routes_retained': len(diff['routes_retained']),
+        'pricing_added': len(diff['pricing_add']),
+        'pricing_updated': len(diff['pricing_update']),
+        'pricing_removed': len(diff['pricing_remove'])
+    }
+
+def apply_catalog_diff(diff, progress=None):
+    """Stage the inserts, updates and deletes of a catalog diff in the session.
+
+    ``progress``, if given, is called as ``progress(routes_written,
+    prices_written)`` every IMPORT_PROGRESS_EVERY changes and once at the
+    end. Nothing is flushed before the caller commits.
+    """
+    from import_data import DEFAULT_TIMINGS
+    written = {'routes': 0, 'prices': 0}
+
+    def staged(kind):
+        written[kind] += 1
+        if progress and (written['routes'] + written['prices']) % IMPORT_PROGRESS_EVERY == 0:
+            progress(written['routes'], written['prices'])
+
+    with db.session.no_autoflush:
+        for route_data in diff['routes_add']:
+            route = Route(name=route_data['name'], bus_number=route_data['bus_number'])
+            route.set_stops(route_data['stops'])
+            route.set_timings(DEFAULT_TIMINGS)
+            db.session.add(route)
+            staged('routes')
+        for route, route_data in diff['routes_update']:
+            route.bus_number = route_data['bus_number']
+            route.set_stops(route_data['stops'])
+            staged('routes')
+        for route in diff['routes_remove']:
+            db.session.delete(route)
+            staged('routes')
+
+        for location, price in diff['pricing_add']:
+            db.session.add(Pricing(location=location, price=price))
+            staged('prices')
+        for pricing, price in diff['pricing_update']:
+            pricing.price = price
+            staged('prices')
+        for pricing in diff['pricing_remove']:
+            db.session.delete(pricing)
+            staged('prices')
+
+    if progress:
+        progress(written['routes'], written['prices'])
+
+def describe_catalog_diff(diff):
+    """Return a JSON-serializable listing of the changes in a catalog diff"""
+    return {
+        'routes_add': [[route_data['name'], len(route_data['stops'])] for route_data in diff['routes_add']],
+        'routes_update': [[route.name, len(route_data['stops'])] for route, route_data in diff['routes_update']],
+        'routes_remove': [route.name for route in diff['routes_remove']],
+        'routes_retained': [route.name for route in diff['routes_retained']],
+        'pricing_add': [[location, price] for location, price in diff['pricing_add']],
+        'pricing_update': [[pricing.location, pricing.price, price] for pricing, price in diff['pricing_update']],
+        'pricing_remove': [pricing.location for pricing in diff['pricing_remove']]
+    }
+
+def import_catalog(path=EXCEL_FILE_PATH, dry_run=False, force=False, progress=None):
+    """Import routes and pricing from the workbook, applying only the differences.
+
+    The import is skipped when the workbook fingerprint matches the last
+    applied import (unless ``force`` is set). With ``dry_run`` the diff is
+    computed and reported but nothing is written. ``progress`` is called
+    as ``progress(phase, rows_parsed, routes_written=0, prices_written=0)``
+    while the workbook is parsed, before the diff is computed and while the
+    changes are applied.
+    """
+    from import_data import workbook_fingerprint, load_parsed_workbook
+
+    timings = {}
+    started = time.perf_counter()
+    workbook_hash = workbook_fingerprint(path)
+    timings['hash_ms'] = (time.perf_counter() - started) * 1000
+
+    report = {'workbook_hash': workbook_hash, 'unchanged': False, 'rows_parsed': 0,
+              'diff': None, 'summary': None, 'timings': timings}
+
+    last_import = DataImport.query.order_by(DataImport.id.desc()).first()
+    if not force and last_import and last_import.workbook_hash == workbook_hash:
+        report['unchanged'] = True
+        return report
+
+    step = time.perf_counter()
+    if progress:
+        parsed = load_parsed_workbook(path, progress=lambda rows: progress('parsing', rows))
+        progress('applying', parsed['rows'])
+    else:
+        parsed = load_parsed_workbook(path)
+    timings['parse_ms'] = (time.perf_counter() - step) * 1000
+
+    step = time.perf_counter()
+    diff = diff_catalog(parsed)
+    timings['diff_ms'] = (time.perf_counter() - step) * 1000
+
+    report['rows_parsed'] = parsed['rows']
+    report['diff'] = diff
+    report['summary'] = summarize_catalog_diff(diff)
+    if dry_run:
+        return report
+
+    step = time.perf_counter()
+    if progress:
+        apply_catalog_diff(diff, progress=lambda routes, prices: progress('applying', parsed['rows'], routes, prices))
+    else:
+        apply_catalog_diff(diff)
+    db.session.add(DataImport(
+        workbook_hash=workbook_hash,
+        duration_ms=(time.perf_counter() - started) * 1000,
+        **{key: value for key, value in report['summary'].items() if key != 'routes_retained'}
+    ))
+    db.session.commit()
+    timings['apply_ms'] = (time.perf_counter() - step) * 1000
+
+    return report
+
+def submit_import_job(dry_run=False, force=False):
+    """Queue a catalog import job.
+
+    Only one job may be queued or running at a time: the active job holds
+    the unique ``active_lock`` value, so a concurrent submit from any worker
+    fails on the constraint. A job whose heartbeat is older than
+    IMPORT_JOB_STALE_AFTER is considered abandoned and its lock released.
+
+    Returns ``(job, created)``; when another import is active, that job is
+    returned with ``created`` False.
+    """
+    for _ in range(2):
+        job = ImportJob(dry_run=dry_run, force=force, active_lock=ImportJob.LOCK)
+        db.session.add(job)
+        try:
+            db.session.commit()
+            return job, True
+        except IntegrityError:
+            db.session.rollback()
+
+        active = ImportJob.query.filter_by(active_lock=ImportJob.LOCK).first()
+        if active is None:
+            continue
+        if datetime.utcnow() - active.updated_at < IMPORT_JOB_STALE_AFTER:
+            return active, False
+        active.status = 'failed'
+        active.error_message = 'Import abandoned (no progress reported)'
+        active.finished_at = datetime.utcnow()
+        active.active_lock = None
+        db.session.commit()
+
+    return ImportJob.query.filter_by(active_lock=ImportJob.LOCK).first(), False
+
+def run_import_job(job_id):
+    """Run a queued import job, recording progress and the final report"""
+    with app.app_context():
+        job = db.session.get(ImportJob, job_id)
+        job.status = 'running'
+        job.phase = 'fingerprint'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        def progress(phase, rows_parsed, routes_written=0, prices_written=0):
+            # Own short transaction, so the heartbeat never commits catalog
+            # changes staged in the session
+            with db.engine.begin() as connection:
+                connection.execute(db.update(ImportJob).where(ImportJob.id == job_id).values(
+                    phase=phase, rows_parsed=rows_parsed, routes_written=routes_written,
+                    prices_written=prices_written, updated_at=datetime.utcnow()))
+
+        try:
+            report = import_catalog(EXCEL_FILE_PATH, dry_run=job.dry_run, force=job.force, progress=progress)
+            summary = report['summary']
+            job.rows_parsed = report['rows_parsed']
+            if summary and not job.dry_run:
+                job.routes_written = summary['routes_added'] + summary['routes_updated'] + summary['routes_removed']
+                job.prices_written = summary['pricing_added'] + summary['pricing_updated'] + summary['pricing_removed']
+            job.set_report({
+                'workbook_hash': report['workbook_hash'],
+                'unchanged': report['unchanged'],
+                'summary': summary,
+                'changes': describe_catalog_diff(report['diff']) if report['diff'] else None,
+                'timings': report['timings']
+            })
+            job.status = 'completed'
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(ImportJob, job_id)
+            job.status = 'failed'
+            job.error_message = str(e)
+
+        job.phase = None
+        job.finished_at = datetime.utcnow()
+        job.active_lock = None
+        db.session.commit()
+
+def start_import_job(dry_run=False, force=False):
+    """Submit an import job and run it on a background thread"""
+    job, created = submit_import_job(dry_run=dry_run, force=force)
+    if created:
+        threading.Thread(target=run_import_job, args=(job.id,), daemon=True).start()
+    return job, created
 
 # Routes
 @app.route('/')
@@ -381,6 +1395,10 @@ def index():
 @app.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
+        rejected = throttle_response('register')
+        if rejected:
+            return rejected
+        
         name = request.form['name']
         email = request.form['email']
         phone = request.form['phone']
@@ -422,6 +1440,10 @@ def login():
         email = request.form['email']
         password = request.form['password']
         
+        rejected = throttle_response('login', account=email)
+        if rejected:
+            return rejected
+        
         user = User.query.filter_by(email=email).first()
         
         if user and bcrypt.check_password_hash(user.password, password):
@@ -465,7 +1487,7 @@ def dashboard():
     # Get latest pass
     latest_pass = Pass.query.filter_by(user_id=user.id).order_by(Pass.created_at.desc()).first()
     days_until_expiry = None
-    if latest_pass and latest_pass.status == 'Approved' and latest_pass.expiry_date >= date.today():
+    if latest_pass and latest_pass.status == 'Approved':
         days_until_expiry = (latest_pass.expiry_date - date.today()).days
     
     return render_template('dashboard.html', 
@@ -570,6 +1592,11 @@ def create_pass():
             flash('Please select both location and route.', 'danger')
             return redirect(url_for('create_pass'))
         
+        # Accept the location regardless of case and punctuation
+        match = get_location_index().lookup(selected_location)
+        if match:
+            selected_location = match['location']
+
         # Get pricing for selected location
         pricing = Pricing.query.filter_by(location=selected_location).first()
         if not pricing:
@@ -585,19 +1612,18 @@ def create_pass():
         
         return redirect(url_for('payment_gateway'))
     
-    # Get all available locations from pricing
-    pricing_all = Pricing.query.all()
-    locations = [p.location for p in pricing_all]
-    pricing_data = {p.location: p.price for p in pricing_all}
-    
-    return render_template('create_pass.html', 
-                         profile=profile, 
-                         locations=locations, 
-                         pricing_data=pricing_data)
+    # Locations are suggested through /api/locations/autocomplete; prices and
+    # routes come from the versioned location catalog
+    return render_template('create_pass.html', profile=profile, catalog_version=get_catalog_version())
 
 @app.route('/pass/<int:pass_id>')
 @login_required
 def pass_detail(pass_id):
+    etag = pass_page_etag(pass_id, 'detail')
+    not_modified = pass_page_not_modified(etag)
+    if not_modified:
+        return not_modified
+    
     user = User.query.get(session['user_id'])
     bus_pass = Pass.query.get_or_404(pass_id)
     
@@ -610,14 +1636,19 @@ def pass_detail(pass_id):
     expired = is_pass_expired(bus_pass)
     days_until_expiry = get_days_until_expiry(bus_pass) if not expired else 0
     
-    return render_template('pass_detail.html', 
-                         bus_pass=bus_pass, 
-                         expired=expired, 
-                         days_until_expiry=days_until_expiry)
+    return with_pass_page_etag(render_template('pass_detail.html', 
+                                               bus_pass=bus_pass, 
+                                               expired=expired, 
+                                               days_until_expiry=days_until_expiry), etag)
 
 @app.route('/pass/<int:pass_id>/print')
 @login_required
 def print_pass(pass_id):
+    etag = pass_page_etag(pass_id, 'print')
+    not_modified = pass_page_not_modified(etag)
+    if not_modified:
+        return not_modified
+    
     user = User.query.get(session['user_id'])
     bus_pass = Pass.query.get_or_404(pass_id)
     
@@ -627,28 +1658,155 @@ def print_pass(pass_id):
         return redirect(url_for('dashboard'))
     
     # Generate QR code for pass verification
-    qr_data = f"PASS:{bus_pass.id}:{bus_pass.user.profile.pass_no}:{bus_pass.status}"
-    qr = qrcode.QRCode(version=1, box_size=8, border=2)
-    qr.add_data(qr_data)
-    qr.make(fit=True)
+    qr_code_data = make_qr_data_url(pass_qr_payload(bus_pass))
     
-    img = qr.make_image(fill_color="black", back_color="white")
-    img_io = io.BytesIO()
-    img.save(img_io, 'PNG')
-    img_io.seek(0)
-    qr_code_b64 = base64.b64encode(img_io.read()).decode('utf-8')
-    qr_code_data = f"data:image/png;base64,{qr_code_b64}"
-    
-    return render_template('printable_pass.html', 
-                         bus_pass=bus_pass, 
-                         user=bus_pass.user,
-                         qr_code_data=qr_code_data)
+    return with_pass_page_etag(render_template('printable_pass.html', 
+                                               bus_pass=bus_pass, 
+                                               user=bus_pass.user,
+                                               qr_code_data=qr_code_data), etag)
 
 @app.route('/route_map')
 @login_required
 def route_map():
-    routes = Route.query.all()
-    return render_template('route_map.html', routes=routes)
+    # Only read inside {% cache %}; a fragment cache hit runs no query
+    return render_template('route_map.html', routes=LazySequence(Route.query.all))
+
+@app.route('/api/routes.geojson')
+@login_required
+def routes_geojson():
+    """Route geometry as GeoJSON; pass detail=low for the simplified low-zoom variant"""
+    detail = 'low' if request.args.get('detail') == 'low' else 'full'
+    return cached_json_response(get_routes_geojson(detail), mimetype='application/geo+json')
+
+@app.route('/api/location_catalog.json')
+@login_required
+def location_catalog():
+    """Locations with prices and serving routes in one document.
+
+    The create pass page requests it with v=<catalog version>; a versioned
+    URL never changes content, so the browser may keep it without asking.
+    """
+    if request.args.get('v') == str(get_catalog_version()):
+        cache_control = 'private, max-age=86400'
+    else:
+        cache_control = 'private, no-cache'
+    return cached_json_response(get_location_catalog(), cache_control=cache_control)
+
+@app.route('/assets/<path:filename>')
+def vendor_asset(filename):
+    """Serve vendored assets, precompressed when a .br/.gz variant exists"""
+    from vendor_assets import VENDOR_DIR
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    for candidate in accepted_encodings():
+        suffix = '.br' if candidate == 'br' else '.gz'
+        if os.path.isfile(os.path.join(VENDOR_DIR, filename + suffix)):
+            encoding = candidate
+            break
+
+    if encoding:
+        response = send_from_directory(VENDOR_DIR, filename + ('.br' if encoding == 'br' else '.gz'),
+                                       mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(VENDOR_DIR, filename, mimetype=mimetype)
+
+    if filename in get_asset_manifest().values():
+        # Fingerprinted names change with their content
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'public, max-age=86400'
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.route('/api/nearest_stops')
+@login_required
+def nearest_stops():
+    """Nearest route stops, with their routes and prices, to lat/lng"""
+    try:
+        lat = float(request.args['lat'])
+        lng = float(request.args['lng'])
+        k = min(max(int(request.args.get('k', 5)), 1), 50)
+    except (KeyError, ValueError):
+        return jsonify({'error': 'lat and lng are required numbers, k an integer'}), 400
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return jsonify({'error': 'lat/lng out of range'}), 400
+
+    results = []
+    for distance, stop in get_stop_index().nearest(lat, lng, k):
+        results.append({
+            'name': stop['name'],
+            'lat': stop['lat'],
+            'lng': stop['lng'],
+            'distance_m': round(distance),
+            'price': stop['price'],
+            'routes': stop['routes']
+        })
+    return jsonify(results)
+
+@app.route('/api/locations/autocomplete')
+@login_required
+def location_autocomplete():
+    """Ranked location suggestions, with prices, for a typed prefix or misspelling"""
+    query = request.args.get('q', '')
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+
+    return jsonify([
+        {'location': entry['location'], 'price': entry['price'], 'score': round(score, 3)}
+        for score, entry in get_location_index().search(query, limit)
+    ])
+
+@app.route('/api/passes/verify', methods=['POST'])
+def verify_passes():
+    """Check a batch of scanned pass QR payloads: {"payloads": [...]}.
+
+    Signatures and expiry are checked from the payload alone and revocations
+    against the worker's cached list, so a batch from a scanner
+    authenticating with VERIFY_TOKEN runs no query, apart from a revocation
+    version lookup every REVOCATION_VERSION_CHECK.
+    """
+    if not bearer_token_or_admin('VERIFY_TOKEN'):
+        return jsonify({'error': 'verify token or admin login required'}), 403
+
+    payloads = (request.get_json(silent=True) or {}).get('payloads')
+    if not isinstance(payloads, list) or len(payloads) > VERIFY_BATCH_LIMIT:
+        return jsonify({'error': f'payloads must be a list of at most {VERIFY_BATCH_LIMIT} scanned codes'}), 400
+
+    from revocation import contains
+    signer, today, revoked = get_pass_signer(), date.today(), get_revoked_pass_ids()
+    results = [signer.verify(payload, today) for payload in payloads]
+    for result in results:
+        if result['valid'] and contains(revoked, result['pass_id']):
+            result.update(valid=False, reason='revoked')
+    return jsonify({'results': results})
+
+@app.route('/api/revocations')
+def revocations():
+    """Revoked pass ids for offline scanners (revocation.py text encoding).
+
+    With ?since=<version> of a list the device already holds, only the ids
+    added and removed since then are sent; an unknown or pruned version gets
+    the full list instead.
+    """
+    if not bearer_token_or_admin('VERIFY_TOKEN'):
+        return jsonify({'error': 'verify token or admin login required'}), 403
+
+    from revocation import decode_ids, diff, to_text
+    latest = refresh_revocation_list()
+    since = request.args.get('since', type=int)
+    base = latest if since == latest.version else db.session.get(RevocationList, since) if since else None
+
+    body = {'version': latest.version, 'count': latest.count}
+    if base is None:
+        body['ids'] = to_text(decode_ids(latest.ids))
+    else:
+        added, removed = diff(decode_ids(base.ids), decode_ids(latest.ids))
+        body.update(since=since, added=to_text(added), removed=to_text(removed))
+    return jsonify(body)
 
 @app.route('/api/routes_by_location/<location>')
 @login_required
@@ -682,21 +1840,8 @@ def generate_qr():
     # Create UPI payment string (demo)
     upi_string = f"upi://pay?pa=demo@paytm&pn=PassFlow&am={pass_data['amount']}&cu=INR&tn=Bus Pass Payment for {pass_data['location']}"
     
-    # Generate QR code
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(upi_string)
-    qr.make(fit=True)
-    
-    # Create QR code image
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Convert to base64 for embedding in HTML
-    img_io = io.BytesIO()
-    img.save(img_io, 'PNG')
-    img_io.seek(0)
-    img_b64 = base64.b64encode(img_io.read()).decode('utf-8')
-    
-    return f"data:image/png;base64,{img_b64}"
+    # Generate QR code as a base64 data URL for embedding in HTML
+    return make_qr_data_url(upi_string, box_size=10, border=5)
 
 @app.route('/payment_gateway')
 @login_required
@@ -708,54 +1853,92 @@ def payment_gateway():
     
     pass_data = session['pass_data']
     route = Route.query.get(pass_data['route_id'])
+    if not route:
+        flash('Selected route is no longer available. Please select route again.', 'danger')
+        return redirect(url_for('create_pass'))
+    
+    # Issue the idempotency key for this purchase once; re-renders reuse it
+    if 'idempotency_key' not in pass_data:
+        pass_data['idempotency_key'] = secrets.token_urlsafe(24)
+        pass_data['bus_number'] = route.bus_number
+        session['pass_data'] = pass_data
     
     return render_template('payment_gateway.html', 
                          pass_data=pass_data, 
                          route=route)
 
+def find_idempotent_payment(idempotency_key):
+    """Payment already recorded under an idempotency key, if any"""
+    return Payment.query.filter_by(idempotency_key=idempotency_key).first()
+
+def already_processed_redirect(payment):
+    """Send a repeated submit to the pass its key created; a key that belongs
+    to another user is treated as an invalid payment session"""
+    if payment.user_id != session['user_id']:
+        flash('Invalid payment session.', 'danger')
+        return redirect(url_for('create_pass'))
+    session.pop('pass_data', None)
+    flash('This payment was already processed.', 'info')
+    return redirect(url_for('pass_detail', pass_id=payment.pass_id))
+
 @app.route('/process_payment', methods=['POST'])
 @login_required
 def process_payment():
-    """Process the demo payment and create pass"""
-    if 'pass_data' not in session:
+    """Process the demo payment and create pass.
+
+    The pass, payment and profile update are written in a single
+    transaction. The idempotency key issued by payment_gateway is stored on
+    the payment, so a repeated submit (double click, retry, back button)
+    returns the pass created the first time without writing again.
+    """
+    idempotency_key = request.form.get('idempotency_key')
+    if idempotency_key:
+        existing_payment = find_idempotent_payment(idempotency_key)
+        if existing_payment:
+            return already_processed_redirect(existing_payment)
+    
+    pass_data = session.get('pass_data')
+    if not pass_data or not idempotency_key or pass_data.get('idempotency_key') != idempotency_key:
         flash('Invalid payment session.', 'danger')
         return redirect(url_for('create_pass'))
     
-    user = User.query.get(session['user_id'])
-    profile = user.profile
-    pass_data = session['pass_data']
-    
+    profile = Profile.query.filter_by(user_id=session['user_id']).first()
     payment_method = request.form.get('payment_method', 'UPI')
     
     # Create pass with auto-approval
     new_pass = Pass(
-        user_id=user.id,
+        user_id=profile.user_id,
         route_id=pass_data['route_id'],
         amount_paid=pass_data['amount'],
         expiry_date=profile.semester_end_date,
         status='Approved'  # Auto-approve after payment
     )
-    db.session.add(new_pass)
-    db.session.commit()
     
     # Create payment record
     payment = Payment(
-        user_id=user.id,
-        pass_id=new_pass.id,
+        user_id=profile.user_id,
+        bus_pass=new_pass,
         amount=pass_data['amount'],
-        payment_method=payment_method
+        payment_method=payment_method,
+        idempotency_key=idempotency_key
     )
     payment.transaction_id = payment.generate_transaction_id()
-    db.session.add(payment)
+    db.session.add_all([new_pass, payment])
     
     # Update profile with selected route
     profile.location = pass_data['location']
     profile.route_id = pass_data['route_id']
-    route = Route.query.get(pass_data['route_id'])
-    if route:
-        profile.bus_number = route.bus_number
+    profile.bus_number = pass_data['bus_number']
     
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent submit with the same key won the race
+        db.session.rollback()
+        existing_payment = find_idempotent_payment(idempotency_key)
+        if not existing_payment:
+            raise
+        return already_processed_redirect(existing_payment)
     
     # Clear session data
     session.pop('pass_data', None)
@@ -770,6 +1953,13 @@ def payment_success():
     return render_template('payment_success.html')
 
 # Admin routes
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics; admins only, or scrapers presenting METRICS_TOKEN as a bearer token"""
+    if not bearer_token_or_admin('METRICS_TOKEN'):
+        return 'Admin access required\n', 403, {'Content-Type': 'text/plain'}
+    return REGISTRY.render(), 200, {'Content-Type': METRICS_CONTENT_TYPE}
+
 @app.route('/admin')
 @admin_required
 def admin_dashboard():
@@ -779,8 +1969,10 @@ def admin_dashboard():
     total_revenue = db.session.query(db.func.sum(Payment.amount)).scalar() or 0
     
     # Get recent activity
-    recent_passes = Pass.query.order_by(Pass.created_at.desc()).limit(5).all()
-    pending_payments = Pass.query.filter_by(status='Pending').all()
+    recent_passes = Pass.query.options(joinedload(Pass.user)).order_by(Pass.created_at.desc()).limit(5).all()
+    pending_payments = Pass.query.options(
+        joinedload(Pass.user), joinedload(Pass.route)
+    ).filter_by(status='Pending').all()
     
     return render_template('admin/dashboard.html',
                          total_users=total_users,
@@ -802,17 +1994,24 @@ def approve_pass(pass_id):
 @admin_required
 def data_management():
     """View imported data statistics and management"""
-    routes = Route.query.all()
-    pricing = Pricing.query.all()
-    
-    # Calculate statistics
-    total_stops = sum(len(route.get_stops()) for route in routes)
-    avg_price = sum(p.price for p in pricing) / len(pricing) if pricing else 0
+    # Loaded only when a {% cache %} block misses
+    routes = LazySequence(Route.query.all)
+    pricing = LazySequence(Pricing.query.all)
+    
+    # Calculate statistics (once per catalog version)
+    route_count, total_stops, price_count, avg_price = get_catalog_cached('catalog_stats', lambda: (
+        len(routes),
+        sum(len(route.get_stops()) for route in routes),
+        len(pricing),
+        sum(p.price for p in pricing) / len(pricing) if pricing else 0
+    ))
     
     return render_template('admin/data_management.html',
                          routes=routes,
                          pricing=pricing,
+                         route_count=route_count,
                          total_stops=total_stops,
+                         price_count=price_count,
                          avg_price=avg_price)
 
 @app.route('/admin/reject_pass/<int:pass_id>')
@@ -821,14 +2020,14 @@ def reject_pass(pass_id):
     bus_pass = Pass.query.get_or_404(pass_id)
     bus_pass.status = 'Rejected'
     db.session.commit()
+    publish_revocations()
     flash(f'Pass for {bus_pass.user.name} rejected.', 'warning')
     return redirect(url_for('admin_dashboard'))
 
 @app.route('/admin/routes')
 @admin_required
 def admin_routes():
-    routes = Route.query.all()
-    return render_template('admin/routes.html', routes=routes)
+    return render_template('admin/routes.html', routes=LazySequence(Route.query.all))
 
 @app.route('/admin/routes/add', methods=['GET', 'POST'])
 @admin_required
@@ -894,13 +2093,16 @@ def add_pricing():
 @app.route('/admin/users')
 @admin_required
 def admin_users():
-    users = User.query.filter_by(role='student').all()
+    users = User.query.options(
+        joinedload(User.profile).joinedload(Profile.route),
+        selectinload(User.passes)
+    ).filter_by(role='student').all()
     return render_template('admin/users.html', users=users)
 
 @app.route('/admin/payments')
 @admin_required
 def admin_payments():
-    payments = Payment.query.order_by(Payment.created_at.desc()).all()
+    payments = Payment.query.options(joinedload(Payment.user)).order_by(Payment.created_at.desc()).all()
     return render_template('admin/payments.html', payments=payments)
 
 @app.route('/admin/print_passes')
@@ -908,18 +2110,14 @@ def admin_payments():
 def admin_print_passes():
     """Admin interface to manage bulk pass printing"""
     # Get statistics for different pass statuses
-    approved_passes = Pass.query.filter_by(status='Approved').all()
-    pending_passes = Pass.query.filter_by(status='Pending').all()
-    all_passes = Pass.query.all()
+    status_counts = dict(db.session.query(Pass.status, db.func.count(Pass.id)).group_by(Pass.status))
     
     # Get filter options
     routes = Route.query.all()
     locations = [p.location for p in Pricing.query.all()]
     
     return render_template('admin/print_passes.html',
-                         approved_passes=approved_passes,
-                         pending_passes=pending_passes,
-                         all_passes=all_passes,
+                         status_counts=status_counts,
                          routes=routes,
                          locations=locations)
 
@@ -944,22 +2142,15 @@ def admin_bulk_print():
         # Filter by user profile location
         query = query.join(User).join(Profile).filter(Profile.location == location_filter)
     
-    passes = query.all()
+    passes = query.options(
+        selectinload(Pass.user).joinedload(User.profile),
+        selectinload(Pass.route)
+    ).all()
     
     # Generate QR codes for all passes
     passes_with_qr = []
     for bus_pass in passes:
-        qr_data = f"PASS:{bus_pass.id}:{bus_pass.user.profile.pass_no}:{bus_pass.status}"
-        qr = qrcode.QRCode(version=1, box_size=8, border=2)
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        img_io = io.BytesIO()
-        img.save(img_io, 'PNG')
-        img_io.seek(0)
-        qr_code_b64 = base64.b64encode(img_io.read()).decode('utf-8')
-        qr_code_data = f"data:image/png;base64,{qr_code_b64}"
+        qr_code_data = make_qr_data_url(pass_qr_payload(bus_pass))
         
         passes_with_qr.append({
             'pass': bus_pass,
@@ -1039,154 +2230,140 @@ def test_alerts():
     flash('Alert check completed! Check the console for sent notifications.', 'info')
     return redirect(url_for('admin_alerts'))
 
-@app.route('/admin/import_data')
+@app.route('/admin/import_data', methods=['GET', 'POST'])
 @admin_required
 def import_excel_data():
-    """Import data from Excel file"""
-    try:
-        import pandas as pd
-        import math
-        
-        # Read the Excel file
-        df = pd.read_excel(EXCEL_FILE_PATH, sheet_name='Monthly Price')
-        
-        # Clear existing data
-        Route.query.delete()
-        Pricing.query.delete()
-        db.session.commit()
-        
-        routes_imported = 0
-        pricing_imported = 0
-        current_route = None
-        route_stops = []
-        
-        for index, row in df.iterrows():
-            if index == 0:  # Skip header
-                continue
-            
-            # Check for route header
-            route_header = str(row.iloc[1])
-            if 'Route No.' in route_header:
-                # Save previous route
-                if current_route and route_stops:
-                    route = Route(name=current_route['name'], bus_number=current_route['bus_number'])
-                    stops_for_json = [{'name': stop['name'], 'lat': stop['lat'], 'lng': stop['lng']} for stop in sorted(route_stops, key=lambda x: x['order'])]
-                    route.set_stops(stops_for_json)
-                    route.set_timings({'First Bus': '06:00 AM', 'Last Bus': '09:00 PM', 'Frequency': 'Every 45-60 minutes'})
-                    db.session.add(route)
-                    routes_imported += 1
-                    route_stops = []
-                
-                # Extract new route info
-                route_parts = route_header.split('Route No.')
-                if len(route_parts) > 1:
-                    route_name = route_parts[0].strip()
-                    route_number = route_parts[1].strip()
-                    current_route = {
-                        'name': f"{route_name} - Route {route_number}",
-                        'bus_number': f"BUS{route_number.zfill(2)}"
-                    }
-                continue
-            
-            # Process station data
-            try:
-                sr_no = row.iloc[1]
-                station_name = row.iloc[2]
-                price_per_month = row.iloc[4]
-                
-                if not pd.isna(sr_no) and not pd.isna(station_name) and not pd.isna(price_per_month):
-                    sr_no = int(sr_no)
-                    station_name = str(station_name).strip()
-                    price_per_month = float(price_per_month)
-                    
-                    if 'SIT COE' not in station_name and price_per_month > 0:
-                        # Add pricing
-                        existing_pricing = Pricing.query.filter_by(location=station_name).first()
-                        if not existing_pricing:
-                            pricing = Pricing(location=station_name, price=price_per_month)
-                            db.session.add(pricing)
-                            pricing_imported += 1
-                        
-                        # Add to route stops
-                        if current_route:
-                            # Generate coordinates around Kolhapur
-                            base_lat, base_lng = 16.7050, 74.2433
-                            angle = (sr_no * 30) % 360
-                            radius = 0.01 + (sr_no * 0.005)
-                            lat = base_lat + (radius * math.cos(math.radians(angle)))
-                            lng = base_lng + (radius * math.sin(math.radians(angle)))
-                            
-                            route_stops.append({
-                                'name': station_name,
-                                'lat': round(lat, 6),
-                                'lng': round(lng, 6),
-                                'order': sr_no
-                            })
-            except (ValueError, TypeError):
-                continue
-        
-        # Save last route
-        if current_route and route_stops:
-            route = Route(name=current_route['name'], bus_number=current_route['bus_number'])
-            stops_for_json = [{'name': stop['name'], 'lat': stop['lat'], 'lng': stop['lng']} for stop in sorted(route_stops, key=lambda x: x['order'])]
-            route.set_stops(stops_for_json)
-            route.set_timings({'First Bus': '06:00 AM', 'Last Bus': '09:00 PM', 'Frequency': 'Every 45-60 minutes'})
-            db.session.add(route)
-            routes_imported += 1
-        
-        db.session.commit()
-        flash(f'Data imported successfully! {routes_imported} routes and {pricing_imported} pricing locations added.', 'success')
-        
-    except FileNotFoundError:
+    """Import form (GET); POST starts a background import, a preview with dry_run=1"""
+    if not os.path.exists(EXCEL_FILE_PATH):
         flash(f'Excel file "{EXCEL_FILE_PATH}" not found in current directory.', 'danger')
-    except Exception as e:
-        flash(f'Error importing data: {str(e)}', 'danger')
-    
-    return redirect(url_for('admin_dashboard'))
+        return redirect(url_for('admin_dashboard'))
+    if request.method == 'GET':
+        return render_template('admin/import_data.html', excel_file=EXCEL_FILE_PATH,
+                               active_job=ImportJob.query.filter_by(active_lock=ImportJob.LOCK).first())
+
+    job, created = start_import_job(dry_run=request.form.get('dry_run') == '1', force=bool(request.form.get('force')))
+    if not created:
+        flash('Another import is already running. Showing its progress.', 'warning')
+    return redirect(url_for('import_job_status', job_id=job.id))
+
+@app.route('/admin/import_jobs/<int:job_id>')
+@admin_required
+def import_job_status(job_id):
+    """Show the progress and final report of an import job"""
+    job = ImportJob.query.get_or_404(job_id)
+    return render_template('admin/import_job.html', job=job, report=job.get_report())
+
+@app.route('/admin/import_jobs/<int:job_id>/progress')
+@admin_required
+def import_job_progress(job_id):
+    """Return the progress of an import job as JSON"""
+    job = ImportJob.query.get_or_404(job_id)
+    return jsonify(job.to_dict())
+
+def init_database():
+    """Upgrade the schema and create the default admin user and alert configurations"""
+    from migrations import upgrade_database
+
+    upgrade_database(db.engine, db.metadata)
+    # Create default admin user if not exists
+    admin = User.query.filter_by(email='admin@example.com').first()
+    if not admin:
+        admin_password = bcrypt.generate_password_hash('admin123').decode('utf-8')
+        admin = User(
+            name='Administrator',
+            email='admin@example.com',
+            phone='1234567890',
+            password=admin_password,
+            role='admin'
+        )
+        db.session.add(admin)
+        db.session.commit()
+        print("Default admin user created!")
+    # Ensure default alert configurations (21 and 7 days) exist
+    defaults = [
+        ("3 Weeks Before Expiry", 21),
+        ("1 Week Before Expiry", 7),
+    ]
+    for name, days in defaults:
+        cfg = AlertConfiguration.query.filter_by(days_before=days).first()
+        if not cfg:
+            cfg = AlertConfiguration(
+                name=name,
+                days_before=days,
+                email_template=(
+                    "Hello {name}, your bus pass ({pass_no}) for {route_name} "
+                    "expires on {expiry_date} (in {days_until_expiry} days). "
+                    "Please renew to avoid interruption."
+                ),
+                sms_template=(
+                    "Bus Pass {pass_no} expires in {days_until_expiry} days (on {expiry_date}). "
+                    "Renew soon."
+                ),
+                is_active=True,
+            )
+            db.session.add(cfg)
+    db.session.commit()
+
+def warm_templates():
+    """Compile every template so forked workers start with them in memory"""
+    names = app.jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+def configure_app_logging():
+    """Set up the passflow loggers from the LOG_* config; create_app and the CLI scripts call this"""
+    from log_config import configure_logging, parse_sample_rates
+    configure_logging(app.config['LOG_LEVEL'], app.config['LOG_FORMAT'],
+                      parse_sample_rates(app.config['LOG_SAMPLE_RATES']))
+
+def trust_proxies(count):
+    """Take the client address and scheme from the last ``count`` proxy hops"""
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    if count and not isinstance(app.wsgi_app, ProxyFix):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=count, x_proto=count)
+
+def create_app(config=None):
+    """Configure the application for serving and return it.
+
+    Routes and models are registered when this module is imported. The
+    factory applies configuration overrides, starts the background log
+    writer, enables the persistent Jinja bytecode cache, compiles all
+    templates and shares the metrics between workers. Call it once at boot (see
+    wsgi.py) so that gunicorn --preload forks workers with warm templates.
+    """
+    if config:
+        app.config.update(config)
+
+    configure_app_logging()
+    trust_proxies(app.config['TRUSTED_PROXIES'])
+    if not os.environ.get('SECRET_KEY'):
+        logging.getLogger('passflow.app').warning(
+            'SECRET_KEY is not set; sessions and pass QR signatures will not survive a restart')
+    from vendor_assets import missing_assets
+    missing = missing_assets()
+    if missing:
+        logging.getLogger('passflow.app').warning(
+            'Static assets not vendored, pages load them from CDNs: %s (run vendor_assets.py)', ', '.join(missing))
+
+    cache_dir = app.config['JINJA_CACHE_DIR']
+    if cache_dir and app.jinja_env.bytecode_cache is None:
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+    if app.config['WARM_TEMPLATES']:
+        warm_templates()
+
+    # Last, so the master's own samples are flushed before workers fork
+    if app.config['METRICS_DB'] and REGISTRY.store is None:
+        REGISTRY.share(app.config['METRICS_DB'])
+    return app
 
 if __name__ == '__main__':
+    create_app()
     with app.app_context():
-        db.create_all()
-        # Create default admin user if not exists
-        admin = User.query.filter_by(email='admin@example.com').first()
-        if not admin:
-            admin_password = bcrypt.generate_password_hash('admin123').decode('utf-8')
-            admin = User(
-                name='Administrator',
-                email='admin@example.com',
-                phone='1234567890',
-                password=admin_password,
-                role='admin'
-            )
-            db.session.add(admin)
-            db.session.commit()
-            print("Default admin user created!")
-        # Ensure default alert configurations (21 and 7 days) exist
-        defaults = [
-            ("3 Weeks Before Expiry", 21),
-            ("1 Week Before Expiry", 7),
-        ]
-        for name, days in defaults:
-            cfg = AlertConfiguration.query.filter_by(days_before=days).first()
-            if not cfg:
-                cfg = AlertConfiguration(
-                    name=name,
-                    days_before=days,
-                    email_template=(
-                        "Hello {name}, your bus pass ({pass_no}) for {route_name} "
-                        "expires on {expiry_date} (in {days_until_expiry} days). "
-                        "Please renew to avoid interruption."
-                    ),
-                    sms_template=(
-                        "Bus Pass {pass_no} expires in {days_until_expiry} days (on {expiry_date}). "
-                        "Renew soon."
-                    ),
-                    is_active=True,
-                )
-                db.session.add(cfg)
-        db.session.commit()
+        init_database()
         # Start background scheduler for expiry alerts
         start_alert_scheduler()
-    import os
     port = int(os.environ.get("PORT", 4000))
-    app.run(host="0.0.0.0", port=port, debug=True)
+    app.run(host="0.0.0.0", port=port, debug=os.environ.get('FLASK_DEBUG') == '1')
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark for PassFlow
+Replays the student purchase journey (register -> login -> complete
+profile -> create pass -> payment -> print pass) and the admin pages
+concurrently against a local instance, reports throughput and latency
+percentiles per endpoint, and appends the results to a history file so
+regressions show up between commits
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, datetime, timedelta
+
+from bench_sqlite import percentile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RESULTS = os.path.join(BASE_DIR, 'bench_results.jsonl')
+
+ADMIN_EMAIL = 'admin@example.com'
+ADMIN_PASSWORD = 'admin123'
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects instead of following them, so every request is timed on its own"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+class VirtualUser:
+    """One browser session recording the latency of every request"""
+
+    def __init__(self, base_url, stats):
+        self.base_url = base_url
+        self.stats = stats
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect())
+
+    def request(self, label, path, data=None):
+        """Send a request and return (status, body, Location header)"""
+        body = urllib.parse.urlencode(data).encode('utf-8') if data is not None else None
+        started = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + path, data=body, timeout=60) as response:
+                status, content, location = response.status, response.read(), response.headers.get('Location')
+        except urllib.error.HTTPError as e:
+            status, content, location = e.code, e.read(), e.headers.get('Location')
+        except (urllib.error.URLError, OSError):
+            status, content, location = 0, b'', None
+        self.stats.record(label, (time.perf_counter() - started) * 1000, status < 400 and status != 0)
+        return status, content.decode('utf-8', 'replace'), location
+
+class Stats:
+    """Thread-safe latency samples per endpoint label"""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, label, elapsed_ms, ok):
+        with self._lock:
+            self.samples.setdefault(label, []).append(elapsed_ms)
+            if not ok:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+    def summary(self, seconds):
+        result = {}
+        for label, values in sorted(self.samples.items()):
+            result[label] = {
+                'count': len(values),
+                'errors': self.errors.get(label, 0),
+                'rps': len(values) / seconds,
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99),
+                'max': max(values)
+            }
+        return result
+
+def student_journey(user, catalog, run_id, sequence):
+    """Register a new student and buy a pass"""
+    email = f'load-{run_id}-{sequence}@example.com'
+    password = 'load-test-password'
+    location, (price, route_ids) = random.choice(catalog)
+    route_id = random.choice(route_ids)
+
+    user.request('GET /register', '/register')
+    user.request('POST /register', '/register', {'name': f'Load Student {sequence}', 'email': email,
+                                                  'phone': '9000000000', 'password': password,
+                                                  'confirm_password': password})
+    user.request('POST /login', '/login', {'email': email, 'password': password})
+    user.request('GET /dashboard', '/dashboard')
+    user.request('GET /profile/complete', '/profile/complete')
+    user.request('POST /profile/complete', '/profile/complete', {
+        'prn': f'L{run_id}{sequence}'[:20], 'location': location, 'semester': '5',
+        'semester_end_date': (date.today() + timedelta(days=120)).isoformat(),
+        'route_id': route_id, 'bus_number': ''
+    })
+    user.request('GET /create_pass', '/create_pass')
+    user.request('POST /create_pass', '/create_pass', {'location': location, 'route_id': route_id})
+    _, page, _ = user.request('GET /payment_gateway', '/payment_gateway')
+    match = re.search(r'name="idempotency_key" value="([^"]+)"', page)
+    if not match:
+        return
+    _, _, location_header = user.request('POST /process_payment', '/process_payment',
+                                         {'idempotency_key': match.group(1), 'payment_method': 'UPI'})
+    match = re.search(r'/pass/(\d+)', location_header or '')
+    if match:
+        user.request('GET /pass/<id>', f'/pass/{match.group(1)}')
+        user.request('GET /pass/<id>/print', f'/pass/{match.group(1)}/print')
+
+def admin_journey(user):
+    """Open the heavy admin pages"""
+    user.request('POST /login (admin)', '/login', {'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+    user.request('GET /admin/bulk_print', '/admin/bulk_print')
+    user.request('GET /admin/users', '/admin/users')
+    user.request('GET /admin/payments', '/admin/payments')
+
+def load_catalog(base_url):
+    """Return [(location, (price, route ids))] for priced locations served by a route"""
+    admin = VirtualUser(base_url, Stats())
+    admin.request('login', '/login', {'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+    _, body, _ = admin.request('catalog', '/api/location_catalog.json')
+    catalog = json.loads(body)
+    return [(location, (price, route_ids)) for location, (price, route_ids) in catalog['locations'].items()
+            if route_ids]
+
+def run_load(base_url, users, seconds, admin_ratio, run_id):
+    """Run journeys from ``users`` concurrent virtual users for ``seconds``"""
+    catalog = load_catalog(base_url)
+    if not catalog:
+        raise SystemExit("❌ No priced locations with routes; import the route data first")
+
+    stats = Stats()
+    counter = iter(range(10 ** 9))
+    counter_lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        while time.perf_counter() < deadline:
+            user = VirtualUser(base_url, stats)
+            if random.random() < admin_ratio:
+                admin_journey(user)
+            else:
+                with counter_lock:
+                    sequence = next(counter)
+                student_journey(user, catalog, run_id, sequence)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats.summary(time.perf_counter() - started)
+
+def serve(port):
+    """Run a local PassFlow instance on a scratch database (child process)"""
+    import logging
+    from werkzeug.serving import make_server
+    import app_complete
+    from import_data import EXCEL_FILE_PATH
+
+    # Keep the per-request access log out of the report
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    app = app_complete.create_app()
+    with app.app_context():
+        app_complete.init_database()
+        if os.path.exists(EXCEL_FILE_PATH):
+            app_complete.import_catalog(EXCEL_FILE_PATH)
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+def start_local_server(tmpdir):
+    """Start serve() in a child process and return (process, base URL)"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    # Every virtual user shares one client IP, so the login limiter is off
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(tmpdir, 'load.db'),
+               JINJA_CACHE_DIR=os.path.join(tmpdir, 'jinja_cache'), THROTTLE_ENABLED='0')
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', str(port)],
+                               cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            if process.poll() is not None:
+                raise SystemExit("❌ Local server failed to start")
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("❌ Local server did not start within 60s")
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_previous(results_file, config):
+    """Return the latest stored run with the same configuration, if any"""
+    previous = None
+    try:
+        with open(results_file) as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get('config') == config:
+                    previous = record
+    except (OSError, ValueError):
+        return None
+    return previous
+
+def print_report(summary, previous, threshold):
+    print(f"{'endpoint':<26}{'count':>7}{'err':>5}{'req/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}  vs previous p95")
+    for label, row in summary.items():
+        change = ''
+        old = (previous or {}).get('endpoints', {}).get(label)
+        if old and old['p95'] > 0:
+            delta = (row['p95'] - old['p95']) / old['p95'] * 100
+            change = f"{delta:+.0f}%"
+            if delta > threshold:
+                change += ' ⚠'
+        print(f"{label:<26}{row['count']:>7}{row['errors']:>5}{row['rps']:>8.1f}"
+              f"{row['p50']:>7.1f}ms{row['p95']:>7.1f}ms{row['p99']:>7.1f}ms  {change}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay user journeys and report per-endpoint latency')
+    parser.add_argument('--url', help='target a running instance instead of starting a local one')
+    parser.add_argument('--users', type=int, default=8, help='concurrent virtual users (default: %(default)s)')
+    parser.add_argument('--seconds', type=float, default=20, help='test duration (default: %(default)s)')
+    parser.add_argument('--admin-ratio', type=float, default=0.1,
+                        help='share of admin journeys (default: %(default)s)')
+    parser.add_argument('--results', default=DEFAULT_RESULTS, help='results history file (default: %(default)s)')
+    parser.add_argument('--threshold', type=float, default=20,
+                        help='flag p95 regressions above this percentage (default: %(default)s)')
+    parser.add_argument('--serve', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    run_id = datetime.now().strftime('%H%M%S')
+    config = {'users': args.users, 'seconds': args.seconds, 'admin_ratio': args.admin_ratio,
+              'target': 'remote' if args.url else 'local'}
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        process = None
+        base_url = args.url.rstrip('/') if args.url else None
+        if not base_url:
+            process, base_url = start_local_server(tmpdir)
+        try:
+            print(f"Load test: {args.users} users for {args.seconds}s against {base_url}")
+            summary = run_load(base_url, args.users, args.seconds, args.admin_ratio, run_id)
+        finally:
+            if process:
+                process.terminate()
+                process.wait()
+
+    previous = load_previous(args.results, config)
+    print_report(summary, previous, args.threshold)
+    total = sum(row['count'] for row in summary.values())
+    print(f"\nTotal: {total} requests, {sum(row['rps'] for row in summary.values()):.1f} req/s")
+
+    record = {'timestamp': datetime.now().isoformat(timespec='seconds'), 'revision': git_revision(),
+              'config': config, 'endpoints': summary}
+    with open(args.results, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    print(f"✓ Results appended to {args.results}")
+
+if __name__ == '__main__':
+    main()
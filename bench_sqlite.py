@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+SQLite throughput benchmark for PassFlow
+Runs N concurrent worker processes doing payment-style writes and
+dashboard-style reads against a scratch database, once per engine profile
+"""
+
+import argparse
+import multiprocessing
+import os
+import secrets
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+def percentile(values, pct):
+    """Return the pct-th percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+def seed_database():
+    """Create the schema with one student, route and pricing row to work against"""
+    from app_complete import app, db, User, Profile, Route, Pricing
+
+    with app.app_context():
+        db.create_all()
+        user = User(name='Bench Student', email='bench@example.com', phone='9999999999',
+                    password='not-a-real-hash')
+        route = Route(name='Bench Route', bus_number='BUS99')
+        route.set_stops([{'name': 'Bench Stop', 'lat': 16.7, 'lng': 74.2}])
+        db.session.add_all([user, route, Pricing(location='Bench Stop', price=1500.0)])
+        db.session.commit()
+        db.session.add(Profile(user_id=user.id, route_id=route.id, location='Bench Stop',
+                               semester_end_date=date.today() + timedelta(days=120), is_complete=True))
+        db.session.commit()
+        return user.id, route.id
+
+def run_worker(user_id, route_id, seconds, read_ratio, results):
+    """Mix writes (pass + payment) and reads (dashboard queries) until the deadline"""
+    from sqlalchemy.exc import OperationalError
+    from app_complete import app, db, Pass, Payment, Pricing
+
+    stats = {'reads': 0, 'writes': 0, 'locked': 0, 'read_ms': [], 'write_ms': []}
+    expiry = date.today() + timedelta(days=120)
+
+    with app.app_context():
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            is_write = secrets.randbelow(1000) >= read_ratio * 1000
+            started = time.perf_counter()
+            try:
+                if is_write:
+                    new_pass = Pass(user_id=user_id, route_id=route_id, amount_paid=1500.0,
+                                    expiry_date=expiry, status='Approved')
+                    db.session.add(new_pass)
+                    db.session.flush()
+                    db.session.add(Payment(user_id=user_id, pass_id=new_pass.id, amount=1500.0,
+                                           transaction_id='TXN' + secrets.token_hex(8)))
+                    db.session.commit()
+                else:
+                    Pass.query.filter_by(user_id=user_id).order_by(Pass.created_at.desc()).first()
+                    Pricing.query.all()
+                    db.session.commit()
+            except OperationalError as e:
+                db.session.rollback()
+                if 'locked' in str(e):
+                    stats['locked'] += 1
+                    continue
+                raise
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if is_write:
+                stats['writes'] += 1
+                stats['write_ms'].append(elapsed_ms)
+            else:
+                stats['reads'] += 1
+                stats['read_ms'].append(elapsed_ms)
+
+    results.put(stats)
+
+def bench_profile(profile, workers, seconds, read_ratio):
+    """Run one benchmark round against a fresh database using the given profile"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ['SQLITE_PROFILE'] = profile
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmpdir, 'bench.db')
+
+        # Spawned children re-import app_complete and pick up the variables above
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(1) as pool:
+            user_id, route_id = pool.apply(seed_database)
+
+        results = ctx.Queue()
+        processes = [ctx.Process(target=run_worker, args=(user_id, route_id, seconds, read_ratio, results))
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+        stats = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    read_ms = [ms for s in stats for ms in s['read_ms']]
+    write_ms = [ms for s in stats for ms in s['write_ms']]
+    return {
+        'profile': profile,
+        'writes_per_s': sum(s['writes'] for s in stats) / seconds,
+        'reads_per_s': sum(s['reads'] for s in stats) / seconds,
+        'locked': sum(s['locked'] for s in stats),
+        'write_p95': percentile(write_ms, 95),
+        'read_p95': percentile(read_ms, 95)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SQLite throughput under concurrent workers')
+    parser.add_argument('--workers', type=int, default=4, help='concurrent worker processes (default: %(default)s)')
+    parser.add_argument('--seconds', type=float, default=5, help='duration per profile (default: %(default)s)')
+    parser.add_argument('--read-ratio', type=float, default=0.8, help='share of reads (default: %(default)s)')
+    parser.add_argument('--profile', action='append', choices=['production', 'default'],
+                        help='profile to run, may be repeated (default: both)')
+    args = parser.parse_args()
+
+    # Workers import app_complete from this directory
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    print(f"SQLite benchmark: {args.workers} workers, {args.seconds}s per profile, {args.read_ratio:.0%} reads")
+    print(f"{'profile':<12}{'writes/s':>10}{'reads/s':>10}{'locked':>8}{'write p95':>12}{'read p95':>11}")
+    for profile in args.profile or ['default', 'production']:
+        result = bench_profile(profile, args.workers, args.seconds, args.read_ratio)
+        print(f"{result['profile']:<12}{result['writes_per_s']:>10.1f}{result['reads_per_s']:>10.1f}"
+              f"{result['locked']:>8}{result['write_p95']:>10.2f}ms{result['read_p95']:>9.2f}ms")
+
+if __name__ == '__main__':
+    main()
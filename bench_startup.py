@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for PassFlow
+Boots the application in fresh interpreter processes and reports how long
+the import, create_app() (bytecode cache + template warm-up) and the first
+requests take, with an empty and with a populated Jinja bytecode cache
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Pages requested right after boot (no login needed)
+FIRST_PAGES = ['/', '/login', '/register']
+
+def boot_once():
+    """Measure one boot in this process and print the timings as JSON"""
+    started = time.perf_counter()
+    import app_complete
+    imported = time.perf_counter()
+
+    app = app_complete.create_app()
+    created = time.perf_counter()
+
+    with app.app_context():
+        app_complete.db.create_all()
+    client = app.test_client()
+    first_request_ms = {}
+    for page in FIRST_PAGES:
+        page_started = time.perf_counter()
+        client.get(page)
+        first_request_ms[page] = (time.perf_counter() - page_started) * 1000
+
+    print(json.dumps({
+        'import_ms': (imported - started) * 1000,
+        'create_app_ms': (created - imported) * 1000,
+        'first_requests_ms': sum(first_request_ms.values()),
+        'total_ms': (time.perf_counter() - started) * 1000
+    }))
+
+def run_boot(env):
+    """Boot the app in a child interpreter and return its timings"""
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'],
+                            env=env, capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def bench_scenario(name, runs, tmpdir, warm_templates, keep_cache):
+    """Boot the app ``runs`` times and return the median timings"""
+    cache_dir = os.path.join(tmpdir, f'jinja_cache_{name}')
+    env = dict(os.environ,
+               DATABASE_URL='sqlite:///' + os.path.join(tmpdir, f'{name}.db'),
+               JINJA_CACHE_DIR=cache_dir,
+               WARM_TEMPLATES='1' if warm_templates else '0')
+
+    results = []
+    for _ in range(runs):
+        if not keep_cache and os.path.isdir(cache_dir):
+            for filename in os.listdir(cache_dir):
+                os.remove(os.path.join(cache_dir, filename))
+        results.append(run_boot(env))
+    return {key: statistics.median(result[key] for result in results) for key in results[0]}
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure PassFlow cold-start time')
+    parser.add_argument('--runs', type=int, default=5, help='boots per scenario (default: %(default)s)')
+    parser.add_argument('--json', metavar='FILE', help='also write the results to FILE as JSON')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        boot_once()
+        return
+
+    scenarios = [
+        ('lazy', False, False),       # Templates compiled on first request
+        ('cold-cache', True, False),  # Warm-up with an empty bytecode cache
+        ('warm-cache', True, True),   # Warm-up from a populated bytecode cache
+    ]
+
+    print(f"Startup benchmark: median of {args.runs} boots")
+    print(f"{'scenario':<12}{'import':>10}{'create_app':>12}{'first reqs':>12}{'total':>10}")
+    report = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, warm_templates, keep_cache in scenarios:
+            result = bench_scenario(name, args.runs, tmpdir, warm_templates, keep_cache)
+            report[name] = result
+            print(f"{name:<12}{result['import_ms']:>8.1f}ms{result['create_app_ms']:>10.1f}ms"
+                  f"{result['first_requests_ms']:>10.1f}ms{result['total_ms']:>8.1f}ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
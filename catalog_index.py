@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+In-memory lookup indexes over the route/pricing catalog
+Built from plain data (no database access), so app_complete can rebuild
+them whenever the catalog version changes
+"""
+
+import heapq
+import math
+
+# Mean Earth radius in metres
+EARTH_RADIUS_M = 6371000
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """Return the great-circle distance between two points in metres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+def collect_stops(routes, prices):
+    """Merge route stops into unique stops with the routes serving them.
+
+    ``routes`` is a list of {'id', 'name', 'bus_number', 'stops'} and
+    ``prices`` maps location names to monthly prices. A stop shared by
+    several routes (same name and coordinates) appears once.
+    """
+    stops = {}
+    for route in routes:
+        for stop in route['stops']:
+            key = (stop['name'], stop['lat'], stop['lng'])
+            if key not in stops:
+                stops[key] = {
+                    'name': stop['name'],
+                    'lat': stop['lat'],
+                    'lng': stop['lng'],
+                    'price': prices.get(stop['name']),
+                    'routes': []
+                }
+            served_by = stops[key]['routes']
+            if not any(r['id'] == route['id'] for r in served_by):
+                served_by.append({'id': route['id'], 'name': route['name'], 'bus_number': route['bus_number']})
+    return list(stops.values())
+
+class StopIndex:
+    """k-nearest-stop lookup backed by a 2-d tree.
+
+    Coordinates are projected to a local equirectangular plane (degrees of
+    longitude scaled by cos(latitude)), which is accurate at city scale.
+    Reported distances are haversine metres.
+    """
+
+    def __init__(self, stops):
+        self.stops = stops
+        if stops:
+            mean_lat = sum(stop['lat'] for stop in stops) / len(stops)
+            self._lng_scale = math.cos(math.radians(mean_lat))
+        else:
+            self._lng_scale = 1.0
+        points = [(self._project(stop['lat'], stop['lng']), i) for i, stop in enumerate(stops)]
+        self._root = self._build(points, 0)
+
+    def __len__(self):
+        return len(self.stops)
+
+    def _project(self, lat, lng):
+        return (lng * self._lng_scale, lat)
+
+    def _build(self, points, axis):
+        """Return a node (point, stop index, axis, left, right) for the median split"""
+        if not points:
+            return None
+        points.sort(key=lambda p: p[0][axis])
+        median = len(points) // 2
+        point, index = points[median]
+        return (point, index, axis,
+                self._build(points[:median], 1 - axis),
+                self._build(points[median + 1:], 1 - axis))
+
+    def nearest(self, lat, lng, k=5):
+        """Return the k nearest stops as (distance in metres, stop), closest first"""
+        if k <= 0 or self._root is None:
+            return []
+
+        target = self._project(lat, lng)
+        best = []  # max-heap of (-squared distance, stop index)
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            point, index, axis, left, right = node
+            dx, dy = point[0] - target[0], point[1] - target[1]
+            distance = dx * dx + dy * dy
+            if len(best) < k:
+                heapq.heappush(best, (-distance, index))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, index))
+
+            delta = target[axis] - point[axis]
+            near, far = (left, right) if delta < 0 else (right, left)
+            # Visit the far side only if the splitting plane is closer than the k-th best
+            if len(best) < k or delta * delta < -best[0][0]:
+                stack.append(far)
+            stack.append(near)
+
+        results = []
+        for _, index in sorted(best, key=lambda item: -item[0]):
+            stop = self.stops[index]
+            results.append((haversine_m(lat, lng, stop['lat'], stop['lng']), stop))
+        return results
+
+# Ranking scores: exact name > name prefix > word prefix > trigram similarity (0-1)
+SCORE_EXACT = 3.0
+SCORE_PREFIX = 2.0
+SCORE_WORD_PREFIX = 1.5
+
+# Minimum trigram similarity for a typo-tolerant match
+MIN_SIMILARITY = 0.3
+
+def normalize_name(name):
+    """Lowercase a name and collapse punctuation and whitespace to single spaces"""
+    return ' '.join(''.join(ch if ch.isalnum() else ' ' for ch in name.lower()).split())
+
+def trigrams(text):
+    """Return the set of character trigrams of a normalized name, padded at word edges"""
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class LocationIndex:
+    """Autocomplete over location names: a prefix trie plus a trigram index.
+
+    Every name is inserted into the trie once as a whole and once per word,
+    so "kol" matches both "Kolhapur" and "Shivaji Nagar Kolhapur". Queries
+    with no prefix match fall back to trigram similarity, which tolerates
+    typos such as "kolhapru".
+    """
+
+    def __init__(self, entries):
+        # entries: list of {'location', 'price'}; names are unique after normalization
+        self.entries = []
+        self._keys = []
+        self._gram_counts = []
+        self._by_key = {}
+        self._trie = {}
+        self._trigrams = {}
+        for entry in entries:
+            key = normalize_name(entry['location'])
+            if not key or key in self._by_key:
+                continue
+            entry_id = len(self.entries)
+            self.entries.append(entry)
+            self._keys.append(key)
+            self._by_key[key] = entry_id
+
+            words = key.split(' ')
+            for start in range(len(words)):
+                self._insert(' '.join(words[start:]), entry_id)
+            grams = trigrams(key)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._trigrams.setdefault(gram, set()).add(entry_id)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _insert(self, text, entry_id):
+        node = self._trie
+        for ch in text:
+            node = node.setdefault(ch, {})
+            node.setdefault('', set()).add(entry_id)  # '' holds the ids below this node
+
+    def _prefix_ids(self, text):
+        node = self._trie
+        for ch in text:
+            node = node.get(ch)
+            if node is None:
+                return set()
+        return node.get('', set())
+
+    def lookup(self, name):
+        """Return the entry whose name equals ``name`` ignoring case and punctuation"""
+        entry_id = self._by_key.get(normalize_name(name))
+        return None if entry_id is None else self.entries[entry_id]
+
+    def search(self, query, limit=10):
+        """Return up to ``limit`` (score, entry) pairs, best first"""
+        key = normalize_name(query)
+        if not key or limit <= 0:
+            return []
+
+        scores = {}
+        for entry_id in self._prefix_ids(key):
+            name = self._keys[entry_id]
+            if name == key:
+                scores[entry_id] = SCORE_EXACT
+            elif name.startswith(key):
+                scores[entry_id] = SCORE_PREFIX
+            else:
+                scores[entry_id] = SCORE_WORD_PREFIX
+
+        if len(scores) < limit:
+            query_grams = trigrams(key)
+            shared = {}
+            for gram in query_grams:
+                for entry_id in self._trigrams.get(gram, ()):
+                    shared[entry_id] = shared.get(entry_id, 0) + 1
+            for entry_id, count in shared.items():
+                if entry_id in scores:
+                    continue
+                similarity = count / (len(query_grams) + self._gram_counts[entry_id] - count)
+                if similarity >= MIN_SIMILARITY:
+                    scores[entry_id] = similarity
+
+        ranked = heapq.nsmallest(limit, scores.items(),
+                                 key=lambda item: (-item[1], len(self._keys[item[0]]), self._keys[item[0]]))
+        return [(score, self.entries[entry_id]) for entry_id, score in ranked]
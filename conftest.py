@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Shared pytest fixtures: an in-memory database seeded with synthetic scale
+data, logged-in test clients and a SQL statement counter
+"""
+
+import os
+from argparse import Namespace
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+
+# Must be set before app_complete is first imported
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['JINJA_CACHE_DIR'] = ''
+os.environ['THROTTLE_DB'] = ':memory:'
+os.environ['METRICS_DB'] = ''
+
+# Small enough to seed in about a second, large enough that a per-row query
+# blows any budget
+SCALE = Namespace(routes=8, stops=10, students=300, semesters=3, photos=0, password='student123',
+                  seed=11, batch_size=5000,
+                  # Current semester ends a week from today, so the 7-day expiry alert has work to do
+                  anchor_date=date.today() - timedelta(days=113))
+
+@pytest.fixture(scope='session')
+def app():
+    from app_complete import app
+    app.config['TESTING'] = True
+    return app
+
+@pytest.fixture(scope='session')
+def scale_data(app):
+    """Seed the in-memory database once per test session"""
+    from app_complete import User
+    from generate_fixtures import generate
+
+    with app.app_context():
+        generate(SCALE)
+        return Namespace(admin_id=User.query.filter_by(role='admin').first().id,
+                         student_id=User.query.filter_by(role='student').order_by(User.id).first().id)
+
+def logged_in_client(app, user_id, role):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['user_role'] = role
+    return client
+
+@pytest.fixture
+def admin_client(app, scale_data):
+    return logged_in_client(app, scale_data.admin_id, 'admin')
+
+@pytest.fixture
+def student_client(app, scale_data):
+    return logged_in_client(app, scale_data.student_id, 'student')
+
+@pytest.fixture
+def count_queries(app, scale_data):
+    """Context manager collecting the SQL statements executed inside it"""
+    from sqlalchemy import event
+    from app_complete import db
+
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+
+    return counting
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Nightly pass expiry sweep for PassFlow
+The scheduler in `python app_complete.py` runs it; deployments without it
+(gunicorn) run this from cron shortly after midnight
+"""
+
+import sys
+
+def main():
+    from app_complete import configure_app_logging, expire_passes
+    configure_app_logging()
+
+    expired = expire_passes()
+    if expired is None:
+        print("❌ Expiry sweep failed, see the passflow.alerts error on stderr")
+        return 1
+    print(f"✓ {expired} passes marked Expired")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Jinja fragment cache for PassFlow
+Adds a {% cache "name" %}...{% endcache %} tag whose output is kept in a
+bounded LRU and reused until the data version it was rendered for changes
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+class FragmentCache:
+    """Thread-safe LRU of rendered fragments"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class LazySequence:
+    """Sequence loaded on first use, for template data read only inside
+    {% cache %} blocks: a cache hit never runs the load (e.g. a query)"""
+
+    def __init__(self, load):
+        self._load = load
+        self._items = None
+
+    def _get(self):
+        if self._items is None:
+            self._items = list(self._load())
+        return self._items
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self):
+        return len(self._get())
+
+    def __bool__(self):
+        return bool(self._get())
+
+    def __getitem__(self, index):
+        return self._get()[index]
+
+class FragmentCacheExtension(Extension):
+    """{% cache "name"[, key, ...] %}...{% endcache %}
+
+    Fragments are keyed by template, fragment name, any extra key values
+    and ``environment.fragment_cache_version()``. The key also carries a
+    token generated when the template is compiled, so editing a template
+    never serves markup rendered from its old source. Only wrap markup
+    that is the same for every visitor.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(
+            fragment_cache=FragmentCache(),
+            fragment_cache_version=lambda: None
+        )
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [nodes.Const(parser.name), nodes.Const(os.urandom(8).hex()), parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(key)]), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, caller):
+        environment = self.environment
+        cache_key = (repr(key), environment.fragment_cache_version())
+        rendered = environment.fragment_cache.get(cache_key)
+        if rendered is None:
+            rendered = caller()
+            environment.fragment_cache.set(cache_key, rendered)
+        return rendered
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Scale fixture generator for PassFlow
+Builds a synthetic campus directly in the database with bulk inserts:
+routes and stops, priced locations, students with profiles and photos,
+passes across several semesters, payments and expiry notification logs.
+The same seed and anchor date always produce the same data set.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+
+CAMPUS = (16.7050, 74.2433)
+SEMESTER_DAYS = 182
+PHOTO_DIR = 'fixtures'  # Under UPLOAD_FOLDER, so profile.photo resolves like an upload
+
+FIRST_NAMES = ['Aarav', 'Aditi', 'Akash', 'Ananya', 'Arjun', 'Diya', 'Ishaan', 'Kavya', 'Meera', 'Neha',
+               'Nikhil', 'Om', 'Pooja', 'Pranav', 'Riya', 'Rohan', 'Sai', 'Sakshi', 'Sneha', 'Tanvi',
+               'Varun', 'Vedant', 'Yash', 'Zoya']
+LAST_NAMES = ['Bhosale', 'Chavan', 'Deshmukh', 'Gaikwad', 'Jadhav', 'Joshi', 'Kadam', 'Kulkarni', 'Mane',
+              'More', 'Patil', 'Pawar', 'Salunkhe', 'Shinde', 'Sawant', 'Shirke', 'Yadav']
+PLACE_PREFIXES = ['Shivaji', 'Rajaram', 'Tarabai', 'Mahalaxmi', 'Rankala', 'Kasaba', 'Ganesh', 'Shahu',
+                  'Sambhaji', 'Laxmi', 'Nagala', 'Kalamba', 'Uchgaon', 'Pachgaon', 'Kagal', 'Morewadi']
+PLACE_SUFFIXES = ['Nagar', 'Peth', 'Chowk', 'Park', 'Colony', 'Wadi', 'Gate', 'Corner', 'Phata', 'Road',
+                  'Vasahat', 'Maidan']
+PAYMENT_METHODS = ['UPI', 'Card', 'Net Banking', 'Mock Payment']
+ID_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+
+def place_names(rng):
+    """Yield unique stop names, adding a numeric suffix once the combinations run out"""
+    combos = [f"{prefix} {suffix}" for prefix in PLACE_PREFIXES for suffix in PLACE_SUFFIXES]
+    rng.shuffle(combos)
+    round_no = 1
+    while True:
+        for name in combos:
+            yield name if round_no == 1 else f"{name} {round_no}"
+        round_no += 1
+
+def build_routes(rng, route_count, stops_per_route, shared_ratio=0.15):
+    """Return (routes, prices): routes radiate from campus and share some junction stops"""
+    names = place_names(rng)
+    routes, stops_seen = [], []
+    for index in range(route_count):
+        bearing = 2 * math.pi * index / route_count + rng.uniform(-0.2, 0.2)
+        lat, lng = CAMPUS
+        stops = []
+        for _ in range(stops_per_route):
+            if stops_seen and rng.random() < shared_ratio:
+                stop = rng.choice(stops_seen)
+                if stop in stops:
+                    continue
+                lat, lng = stop['lat'], stop['lng']
+            else:
+                step_km = rng.uniform(0.6, 1.8)
+                bearing += rng.uniform(-0.35, 0.35)
+                lat += step_km / 111.0 * math.cos(bearing)
+                lng += step_km / (111.0 * math.cos(math.radians(lat))) * math.sin(bearing)
+                stop = {'name': next(names), 'lat': round(lat, 6), 'lng': round(lng, 6)}
+                stops_seen.append(stop)
+            stops.append(stop)
+        stops.reverse()  # Outermost stop first, campus last, like the imported routes
+        routes.append({'name': f"Route {index + 1}: {stops[0]['name']} - Campus",
+                       'bus_number': f"MH09-{1000 + index}", 'stops': stops})
+
+    prices = {}
+    for stop in stops_seen:
+        km = math.hypot((stop['lat'] - CAMPUS[0]) * 111.0,
+                        (stop['lng'] - CAMPUS[1]) * 111.0 * math.cos(math.radians(CAMPUS[0])))
+        prices[stop['name']] = float(round(600 + km * 90, -1))
+    return routes, prices
+
+def semester_windows(anchor, count):
+    """Return [(start, end)] oldest first; the last window contains the anchor date"""
+    current_start = anchor - timedelta(days=60)
+    return [(current_start - timedelta(days=SEMESTER_DAYS * back),
+             current_start - timedelta(days=SEMESTER_DAYS * back) + timedelta(days=SEMESTER_DAYS - 2))
+            for back in range(count - 1, -1, -1)]
+
+def write_photos(rng, upload_folder, count):
+    """Write ``count`` small placeholder portraits and return their profile.photo values"""
+    from PIL import Image, ImageDraw
+
+    directory = os.path.join(upload_folder, PHOTO_DIR)
+    os.makedirs(directory, exist_ok=True)
+    photos = []
+    for index in range(count):
+        background = tuple(rng.randrange(120, 230) for _ in range(3))
+        image = Image.new('RGB', (120, 150), background)
+        draw = ImageDraw.Draw(image)
+        draw.ellipse((35, 20, 85, 75), fill=(90, 70, 60))
+        draw.ellipse((20, 85, 100, 170), fill=tuple(rng.randrange(20, 120) for _ in range(3)))
+        filename = f"student_{index:03d}.jpg"
+        image.save(os.path.join(directory, filename), 'JPEG', quality=80)
+        photos.append(f"{PHOTO_DIR}/{filename}")
+    return photos
+
+def next_id(session, model):
+    from sqlalchemy import func
+    return (session.query(func.max(model.id)).scalar() or 0) + 1
+
+class BulkWriter:
+    """Buffers rows per model and flushes them with executemany inserts"""
+
+    def __init__(self, session, batch_size):
+        self.session = session
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, model, row):
+        buffer = self.buffers.setdefault(model, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Insert every buffer, parents first (models are added in dependency order)"""
+        from sqlalchemy import insert
+
+        for model, rows in self.buffers.items():
+            if rows:
+                self.session.execute(insert(model), rows)
+                self.counts[model.__name__] = self.counts.get(model.__name__, 0) + len(rows)
+                self.buffers[model] = []
+
+def generate(args):
+    """Insert the synthetic campus and return {table: rows inserted}"""
+    from app_complete import (app, db, bcrypt, init_database, increment_catalog_version, User, Profile,
+                              Route, Pricing, Pass, Payment, AlertConfiguration, NotificationLog)
+
+    rng = random.Random(args.seed)
+    anchor = args.anchor_date
+    session = db.session
+
+    init_database()
+    if User.query.filter_by(email=student_email(args.seed, 0)).first():
+        raise SystemExit(f"❌ Fixtures for seed {args.seed} already exist; use a fresh database")
+
+    started = time.perf_counter()
+    writer = BulkWriter(session, args.batch_size)
+
+    # Routes and pricing
+    routes, prices = build_routes(rng, args.routes, args.stops)
+    existing_prices = {location for (location,) in session.query(Pricing.location)}
+    route_id = next_id(session, Route)
+    created = datetime.combine(anchor - timedelta(days=SEMESTER_DAYS * args.semesters), dt_time(9))
+    for route in routes:
+        route['id'] = route_id
+        writer.add(Route, {'id': route_id, 'name': route['name'], 'bus_number': route['bus_number'],
+                           'stops': json.dumps(route['stops']),
+                           'timings': json.dumps({'Morning': '07:30 AM', 'Evening': '05:15 PM'}),
+                           'created_at': created})
+        route_id += 1
+    for location, price in prices.items():
+        if location not in existing_prices:
+            writer.add(Pricing, {'location': location, 'price': price, 'created_at': created})
+    writer.flush()
+    increment_catalog_version(session)
+    print(f"✓ {len(routes)} routes, {len(prices)} priced stops")
+
+    # Students with profiles, passes, payments and notifications
+    password = bcrypt.generate_password_hash(args.password).decode('utf-8')  # Hashed once for everyone
+    photos = write_photos(rng, app.config['UPLOAD_FOLDER'], args.photos) if args.photos else [None]
+    alerts = [(cfg.id, cfg.days_before) for cfg in
+              AlertConfiguration.query.filter_by(is_active=True).order_by(AlertConfiguration.id)]
+    windows = semester_windows(anchor, args.semesters)
+    pass_numbers = rng.sample(range(10 ** 8), args.students)
+
+    user_id, pass_id = next_id(session, User), next_id(session, Pass)
+    for index in range(args.students):
+        route = rng.choice(routes)
+        stop = rng.choice(route['stops'])
+        price = prices[stop['name']]
+        joined = rng.randrange(len(windows))  # Index of the first semester with a pass
+        semester_no = rng.randint(1, 2) + 2 * (len(windows) - 1 - joined)
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        email = student_email(args.seed, index)
+        phone = '9' + ''.join(rng.choices('0123456789', k=9))
+        registered = datetime.combine(windows[joined][0] - timedelta(days=rng.randint(1, 20)),
+                                      dt_time(rng.randint(8, 20), rng.randint(0, 59)))
+
+        writer.add(User, {'id': user_id, 'name': name, 'email': email, 'phone': phone, 'password': password,
+                          'role': 'student', 'created_at': registered})
+        writer.add(Profile, {'user_id': user_id, 'prn': f"FX{args.seed}{index:08d}"[-20:],
+                             'pass_no': f"BP{pass_numbers[index]:08d}", 'photo': rng.choice(photos),
+                             'location': stop['name'], 'semester': str(min(semester_no, 8)),
+                             'semester_end_date': windows[-1][1], 'route_id': route['id'],
+                             'bus_number': route['bus_number'], 'is_complete': True,
+                             'created_at': registered})
+
+        for semester, (start, end) in enumerate(windows[joined:], start=joined):
+            current = semester == len(windows) - 1
+            if not current and rng.random() < 0.1:
+                continue  # Skipped a semester
+            issued = start + timedelta(days=rng.randint(0, 20))
+            purchased = datetime.combine(issued, dt_time(rng.randint(8, 20), rng.randint(0, 59)))
+            roll = rng.random()
+            status = 'Approved' if not current or roll < 0.9 else 'Pending' if roll < 0.97 else 'Rejected'
+            writer.add(Pass, {'id': pass_id, 'user_id': user_id, 'route_id': route['id'], 'amount_paid': price,
+                              'issue_date': issued, 'expiry_date': end, 'status': status,
+                              'created_at': purchased})
+            writer.add(Payment, {'user_id': user_id, 'pass_id': pass_id, 'amount': price,
+                                 'payment_method': rng.choice(PAYMENT_METHODS),
+                                 'transaction_id': 'TXN' + ''.join(rng.choices(ID_CHARS, k=12)),
+                                 'idempotency_key': f"{rng.getrandbits(128):032x}",
+                                 'status': 'Completed' if status != 'Rejected' else 'Failed',
+                                 'created_at': purchased})
+
+            if status == 'Approved':
+                for alert_id, days_before in alerts:
+                    sent = datetime.combine(end - timedelta(days=days_before), dt_time(9))
+                    if sent.date() > anchor:
+                        continue
+                    failed = rng.random() < 0.02
+                    for kind, recipient in (('email', email), ('sms', phone)):
+                        writer.add(NotificationLog, {
+                            'user_id': user_id, 'pass_id': pass_id, 'alert_config_id': alert_id,
+                            'notification_type': kind, 'recipient': recipient,
+                            'message': f"Bus Pass BP{pass_numbers[index]:08d} expires in {days_before} days "
+                                       f"(on {end.isoformat()}). Renew soon.",
+                            'status': 'failed' if failed else 'sent',
+                            'error_message': 'Delivery timed out' if failed else None,
+                            'sent_at': None if failed else sent, 'created_at': sent})
+            pass_id += 1
+        user_id += 1
+
+        if (index + 1) % 10000 == 0:
+            print(f"  {index + 1}/{args.students} students ({time.perf_counter() - started:.0f}s)")
+
+    writer.flush()
+    session.commit()
+    return writer.counts, time.perf_counter() - started
+
+def student_email(seed, index):
+    return f"student{index:06d}.s{seed}@fixtures.passflow.test"
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a large synthetic PassFlow data set')
+    parser.add_argument('--database', help='database URL (default: DATABASE_URL or the app default)')
+    parser.add_argument('--routes', type=int, default=40, help='number of routes (default: %(default)s)')
+    parser.add_argument('--stops', type=int, default=25, help='stops per route (default: %(default)s)')
+    parser.add_argument('--students', type=int, default=100000, help='number of students (default: %(default)s)')
+    parser.add_argument('--semesters', type=int, default=4,
+                        help='semesters of pass history, including the current one (default: %(default)s)')
+    parser.add_argument('--photos', type=int, default=32,
+                        help='placeholder photos shared by the students, 0 for none (default: %(default)s)')
+    parser.add_argument('--password', default='student123',
+                        help='password for every generated student (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed (default: %(default)s)')
+    parser.add_argument('--anchor-date', type=date.fromisoformat, default=date.today(),
+                        help="'today' for the generated history, YYYY-MM-DD (default: today)")
+    parser.add_argument('--batch-size', type=int, default=5000,
+                        help='rows per insert statement batch (default: %(default)s)')
+    args = parser.parse_args()
+
+    if args.database:
+        os.environ['DATABASE_URL'] = args.database
+    from app_complete import app, configure_app_logging
+    configure_app_logging()
+
+    print(f"Generating {args.students} students on {args.routes} routes x {args.stops} stops "
+          f"(seed {args.seed}, anchor {args.anchor_date})...")
+    with app.app_context():
+        counts, elapsed = generate(args)
+
+    for table, count in counts.items():
+        print(f"✓ {table}: {count} rows")
+    print(f"\n✅ {sum(counts.values())} rows in {elapsed:.1f}s")
+
+if __name__ == '__main__':
+    main()
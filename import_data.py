@@ -4,165 +4,302 @@ Data import script for PassFlow
 Reads routes and pricing data from Excel file and imports into database
 """
 
-import pandas as pd
-import re
-from app_complete import app, db, Route, Pricing
+import argparse
+import hashlib
+import marshal
+import math
+import os
+import zlib
 
 # Excel file location
 EXCEL_FILE_PATH = 'routes and price data.xlsx'
 
-def clean_and_import_data():
-    """Read Excel file and import routes and pricing data"""
-    print("Starting data import from Excel file...")
-    
+# Sheet holding the routes and monthly prices
+SHEET_NAME = 'Monthly Price'
+
+# Title row and column header row at the top of the sheet
+HEADER_ROWS = 2
+
+# Workbook reader: 'stream' (openpyxl read-only) or 'pandas'; set PASSFLOW_WORKBOOK_READER to override
+DEFAULT_READER = os.environ.get('PASSFLOW_WORKBOOK_READER', 'stream')
+
+# Parsed-workbook cache, stored next to the workbook as "<workbook>.cache".
+# Bump CACHE_MAGIC whenever the parse output changes.
+CACHE_SUFFIX = '.cache'
+CACHE_MAGIC = b'PFWC1'
+
+# Report parse progress every this many rows
+PROGRESS_EVERY = 100
+
+# Timings assigned to every imported route
+DEFAULT_TIMINGS = {
+    'First Bus': '06:00 AM',
+    'Last Bus': '09:00 PM',
+    'Frequency': 'Every 45-60 minutes'
+}
+
+def _hash_file(path):
+    """Return the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _read_cache(path):
+    """Return the cache entry for a workbook, or None if missing or unreadable"""
     try:
-        # Read the Excel file
-        df = pd.read_excel(EXCEL_FILE_PATH, sheet_name='Monthly Price')
-        print(f"✓ Excel file loaded with {len(df)} rows")
-        
-        with app.app_context():
-            # Clear existing data (optional - comment out to keep existing data)
-            print("Clearing existing route and pricing data...")
-            Route.query.delete()
-            Pricing.query.delete()
-            db.session.commit()
-            
-            routes_imported = 0
-            pricing_imported = 0
-            current_route = None
-            route_stops = []
-            
-            for index, row in df.iterrows():
-                # Skip header row
-                if index == 0:
-                    continue
-                
-                # Check if this is a route header (contains "Route No." in column 1)
-                route_header = str(row.iloc[1])
-                if 'Route No.' in route_header:
-                    # If we have a previous route with stops, save it
-                    if current_route and route_stops:
-                        save_route_with_stops(current_route, route_stops)
-                        routes_imported += 1
-                        route_stops = []
-                    
-                    # Extract route information
-                    route_parts = route_header.split('Route No.')
-                    if len(route_parts) > 1:
-                        route_name = route_parts[0].strip()
-                        route_number = route_parts[1].strip()
-                        
-                        # Create new route
-                        current_route = {
-                            'name': f"{route_name} - Route {route_number}",
-                            'bus_number': f"BUS{route_number.zfill(2)}",
-                            'route_id': route_number
-                        }
-                        print(f"Found route: {current_route['name']}")
-                    continue
-                
-                # Check if this is a stop/station entry (has serial number and station name)
-                try:
-                    sr_no = row.iloc[1]  # Serial number in column 1
-                    station_name = row.iloc[2]  # Station name in column 2
-                    
-                    # Skip if data is not valid
-                    if pd.isna(sr_no) or pd.isna(station_name):
-                        continue
-                    
-                    sr_no = int(sr_no)
-                    station_name = str(station_name).strip()
-                    
-                    # Skip if station is SIT COE (destination)
-                    if 'SIT COE' in station_name or 'SITCOE' in station_name:
-                        continue
-                    
-                    # Get pricing information from column 4 (Bus Charges Per Month)
-                    price_per_month = row.iloc[4]
-                    
-                    if not pd.isna(price_per_month) and price_per_month > 0:
-                        price_per_month = float(price_per_month)
-                        
-                        # Add to pricing table
-                        existing_pricing = Pricing.query.filter_by(location=station_name).first()
-                        if not existing_pricing:
-                            pricing = Pricing(location=station_name, price=price_per_month)
-                            db.session.add(pricing)
-                            pricing_imported += 1
-                            print(f"   Added pricing: {station_name} - ₹{price_per_month}")
-                        
-                        # Add to current route stops
-                        if current_route:
-                            lat, lng = generate_coordinates(station_name, sr_no)
-                            route_stops.append({
-                                'name': station_name,
-                                'lat': lat,
-                                'lng': lng,
-                                'order': sr_no
-                            })
-                    
-                except (ValueError, TypeError, IndexError):
-                    continue
-            
-            # Save the last route if exists
-            if current_route and route_stops:
-                save_route_with_stops(current_route, route_stops)
-                routes_imported += 1
-            
-            db.session.commit()
-            
-            print(f"\n✅ Data import completed!")
-            print(f"   Routes imported: {routes_imported}")
-            print(f"   Pricing locations imported: {pricing_imported}")
-            
-    except FileNotFoundError:
-        print(f"❌ Excel file '{EXCEL_FILE_PATH}' not found!")
-    except Exception as e:
-        print(f"❌ Error importing data: {str(e)}")
+        with open(path + CACHE_SUFFIX, 'rb') as f:
+            data = f.read()
+        if not data.startswith(CACHE_MAGIC):
+            return None
+        size, mtime_ns, workbook_hash, parsed = marshal.loads(zlib.decompress(data[len(CACHE_MAGIC):]))
+        return {'size': size, 'mtime_ns': mtime_ns, 'workbook_hash': workbook_hash, 'parsed': parsed}
+    except (OSError, ValueError, EOFError, TypeError, zlib.error):
+        return None
+
+def _write_cache(path, stat, workbook_hash, parsed):
+    """Write the cache entry for a workbook; failures only cost the next parse"""
+    payload = marshal.dumps((stat.st_size, stat.st_mtime_ns, workbook_hash, parsed))
+    tmp_path = f"{path}{CACHE_SUFFIX}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(CACHE_MAGIC + zlib.compress(payload))
+        os.replace(tmp_path, path + CACHE_SUFFIX)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _cache_is_fresh(entry, stat):
+    """Return True if a cache entry matches the workbook's size and mtime"""
+    return entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+
+def workbook_fingerprint(path=EXCEL_FILE_PATH, use_cache=True):
+    """Return the SHA-256 hex digest of the workbook contents.
+
+    When the parse cache was written for a workbook of the same size and
+    mtime, its recorded digest is returned without reading the workbook.
+    """
+    if use_cache:
+        entry = _read_cache(path)
+        if _cache_is_fresh(entry, os.stat(path)):
+            return entry['workbook_hash']
+    return _hash_file(path)
+
+def _is_blank(value):
+    """Return True for empty cells (None from openpyxl, NaN from pandas)"""
+    if value is None:
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return True
+    return isinstance(value, str) and not value.strip()
+
+def iter_sheet_rows(path=EXCEL_FILE_PATH, reader=DEFAULT_READER):
+    """Yield the rows of the price sheet as tuples of cell values.
+
+    The 'stream' reader walks the sheet with openpyxl in read-only mode, so
+    only one row is held in memory at a time. The 'pandas' reader loads the
+    whole sheet into a DataFrame first.
+    """
+    if reader == 'pandas':
+        import pandas as pd
+
+        df = pd.read_excel(path, sheet_name=SHEET_NAME, header=None)
+        yield from df.itertuples(index=False, name=None)
+        return
+
+    if reader != 'stream':
+        raise ValueError(f"Unknown workbook reader '{reader}'")
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook[SHEET_NAME].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def parse_rows(rows, progress=None):
+    """Run the route/station state machine over an iterable of sheet rows.
+
+    Rows are consumed one at a time, so a generator keeps memory flat. See
+    parse_workbook for the returned structure.
+    """
+    routes = []
+    pricing = {}
+    current_route = None
+    row_count = 0
+
+    for row in rows:
+        row_count += 1
+        if progress and row_count % PROGRESS_EVERY == 0:
+            progress(row_count)
+
+        # Skip title and column header rows
+        if row_count <= HEADER_ROWS or len(row) < 5:
+            continue
+
+        # Check if this is a route header (contains "Route No." in column 1)
+        route_header = str(row[1])
+        if 'Route No.' in route_header:
+            route_parts = route_header.split('Route No.')
+            route_name = route_parts[0].strip()
+            route_number = route_parts[1].strip()
+            current_route = {
+                'name': f"{route_name} - Route {route_number}",
+                'bus_number': f"BUS{route_number.zfill(2)}",
+                'stops': []
+            }
+            routes.append(current_route)
+            continue
+
+        # Check if this is a stop/station entry (has serial number and station name)
+        try:
+            sr_no = row[1]
+            station_name = row[2]
+            price_per_month = row[4]
+
+            if _is_blank(sr_no) or _is_blank(station_name) or _is_blank(price_per_month):
+                continue
+
+            sr_no = int(sr_no)
+            station_name = str(station_name).strip()
+            price_per_month = float(price_per_month)
+
+            # Skip if station is SIT COE (destination)
+            if 'SIT COE' in station_name or 'SITCOE' in station_name:
+                continue
+            if price_per_month <= 0:
+                continue
+
+            pricing.setdefault(station_name, price_per_month)
+
+            if current_route:
+                lat, lng = generate_coordinates(station_name, sr_no)
+                current_route['stops'].append({
+                    'name': station_name,
+                    'lat': lat,
+                    'lng': lng,
+                    'order': sr_no
+                })
+        except (ValueError, TypeError):
+            continue
+
+    # Drop routes without stops and strip the ordering key
+    parsed_routes = []
+    for route in routes:
+        if not route['stops']:
+            continue
+        stops = sorted(route['stops'], key=lambda x: x['order'])
+        route['stops'] = [{'name': stop['name'], 'lat': stop['lat'], 'lng': stop['lng']} for stop in stops]
+        parsed_routes.append(route)
+
+    return {'routes': parsed_routes, 'pricing': pricing, 'rows': row_count}
+
+def parse_workbook(path=EXCEL_FILE_PATH, progress=None, reader=DEFAULT_READER):
+    """Parse the workbook into normalized routes and pricing.
+
+    Returns a dict with:
+      routes  - list of {'name', 'bus_number', 'stops'} in workbook order,
+                stops being [{'name', 'lat', 'lng'}] sorted by serial number
+      pricing - {location: monthly price}, first occurrence wins
+      rows    - number of sheet rows read
+
+    ``progress``, if given, is called with the number of rows read so far
+    every PROGRESS_EVERY rows.
+    """
+    return parse_rows(iter_sheet_rows(path, reader=reader), progress=progress)
+
+def load_parsed_workbook(path=EXCEL_FILE_PATH, progress=None, use_cache=True):
+    """Return parse_workbook(path), served from the parse cache when possible.
+
+    The cache entry is used as-is when the workbook's size and mtime match,
+    or after re-hashing when only the mtime changed (e.g. the file was
+    copied or touched). Otherwise the workbook is parsed and the cache
+    rewritten.
+    """
+    if not use_cache:
+        return parse_workbook(path, progress=progress)
+
+    stat = os.stat(path)
+    entry = _read_cache(path)
+    if _cache_is_fresh(entry, stat):
+        return entry['parsed']
+
+    workbook_hash = _hash_file(path)
+    if entry is not None and entry['workbook_hash'] == workbook_hash:
+        parsed = entry['parsed']
+    else:
+        parsed = parse_workbook(path, progress=progress)
+    _write_cache(path, stat, workbook_hash, parsed)
+    return parsed
 
 def generate_coordinates(station_name, order):
     """Generate approximate coordinates for stations (placeholder implementation)"""
     # Base coordinates around Kolhapur area (adjust as needed)
     base_lat = 16.7050
     base_lng = 74.2433
-    
+
     # Generate coordinates in a rough circle around base point
-    import math
     angle = (order * 30) % 360  # Distribute stops in a circle
     radius = 0.01 + (order * 0.005)  # Varying distance from center
-    
+
     lat = base_lat + (radius * math.cos(math.radians(angle)))
     lng = base_lng + (radius * math.sin(math.radians(angle)))
-    
+
     return round(lat, 6), round(lng, 6)
 
-def save_route_with_stops(route_info, stops):
-    """Save route with its stops to database"""
-    if not stops:
+def print_import_report(report):
+    """Print a catalog import report to the console"""
+    timings = report['timings']
+    if report['unchanged']:
+        print("✓ Workbook unchanged since last import, nothing to do")
+        print(f"   Fingerprint: {report['workbook_hash'][:12]} ({timings['hash_ms']:.1f} ms)")
+        return
+
+    summary = report['summary']
+    print(f"   Routes:  +{summary['routes_added']} ~{summary['routes_updated']} -{summary['routes_removed']}"
+          f" (kept in use: {summary['routes_retained']})")
+    print(f"   Pricing: +{summary['pricing_added']} ~{summary['pricing_updated']} -{summary['pricing_removed']}")
+    for label, key in (('hash', 'hash_ms'), ('parse', 'parse_ms'), ('diff', 'diff_ms'), ('apply', 'apply_ms')):
+        if key in timings:
+            print(f"   {label:<6} {timings[key]:8.1f} ms")
+
+def clean_and_import_data(dry_run=False, force=False):
+    """Read Excel file and apply the route and pricing differences to the database"""
+    from app_complete import app, db, submit_import_job, run_import_job
+
+    print("Starting data import from Excel file...")
+
+    if not os.path.exists(EXCEL_FILE_PATH):
+        print(f"❌ Excel file '{EXCEL_FILE_PATH}' not found!")
         return
-    
-    # Sort stops by order
-    stops.sort(key=lambda x: x['order'])
-    
-    # Create route
-    route = Route(
-        name=route_info['name'],
-        bus_number=route_info['bus_number']
-    )
-    
-    # Set stops (remove order field for JSON storage)
-    stops_for_json = [{'name': stop['name'], 'lat': stop['lat'], 'lng': stop['lng']} for stop in stops]
-    route.set_stops(stops_for_json)
-    
-    # Set basic timings
-    route.set_timings({
-        'First Bus': '06:00 AM',
-        'Last Bus': '09:00 PM',
-        'Frequency': 'Every 45-60 minutes'
-    })
-    
-    db.session.add(route)
-    print(f"   Added route: {route.name} with {len(stops)} stops")
+
+    with app.app_context():
+        # Go through the job table so the CLI never overlaps a web import
+        job, created = submit_import_job(dry_run=dry_run, force=force)
+        if not created:
+            print(f"❌ Import job #{job.id} is already running, try again later.")
+            return
+        run_import_job(job.id)
+        db.session.refresh(job)
+
+        if job.status == 'failed':
+            print(f"❌ Error importing data: {job.error_message}")
+            return
+
+        report = job.get_report()
+        print_import_report(report)
+        if dry_run and not report['unchanged']:
+            print("\nDry run only - no changes were written.")
+        elif not report['unchanged']:
+            print("\n✅ Data import completed!")
 
 if __name__ == '__main__':
-    clean_and_import_data()
+    parser = argparse.ArgumentParser(description='Import routes and pricing from the Excel workbook')
+    parser.add_argument('--dry-run', action='store_true', help='show the differences without writing them')
+    parser.add_argument('--force', action='store_true', help='import even if the workbook is unchanged')
+    args = parser.parse_args()
+    from app_complete import configure_app_logging
+    configure_app_logging()
+    clean_and_import_data(dry_run=args.dry_run, force=args.force)
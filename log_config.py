@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Structured logging for PassFlow
+Records from the "passflow" loggers are put on a bounded queue by the
+calling thread and formatted and written by a background listener, so
+request and scheduler threads never wait on log I/O
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+ROOT_LOGGER = 'passflow'
+QUEUE_SIZE = 10000
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with extra= fields as top-level keys"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for development, extra= fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = ' '.join(f'{key}={value}' for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        return f'{line} {fields}' if fields else line
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of DEBUG/INFO records per logger; warnings and errors always pass.
+
+    ``rates`` maps logger names to a keep probability, e.g.
+    {'passflow.notifications': 0.01}; a rate applies to child loggers too.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        name = record.name
+        while name:
+            if name in self.rates:
+                return random.random() < self.rates[name]
+            name = name.rpartition('.')[0]
+        return True
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    dropped = 0
+
+    def prepare(self, record):
+        """Resolve the message and traceback here; the record crosses threads"""
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+def parse_sample_rates(value):
+    """Parse 'passflow.notifications=0.01,passflow.images=0.5' into a dict"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        name, _, rate = item.partition('=')
+        rates[name.strip()] = float(rate)
+    return rates
+
+_listener = None
+
+def configure_logging(level='INFO', fmt='json', sample_rates=None, stream=None):
+    """Route the passflow loggers through a queue to a background writer thread.
+
+    Safe to call again; the previous listener is stopped and replaced.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+    records = queue.Queue(maxsize=QUEUE_SIZE)
+    handler = DroppingQueueHandler(records)
+    handler.addFilter(SamplingFilter(sample_rates or {}))
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.handlers[:] = [handler]
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def _restart_in_child():
+    """Threads do not survive fork (gunicorn --preload), so each worker starts its own listener"""
+    global _listener
+    if _listener is None:
+        return
+    handler = logging.getLogger(ROOT_LOGGER).handlers[0]
+    handler.queue = queue.Queue(maxsize=QUEUE_SIZE)
+    _listener = logging.handlers.QueueListener(handler.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_in_child)
+
+@atexit.register
+def stop_logging():
+    """Flush queued records; runs at interpreter exit"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Metrics for PassFlow
+Minimal counters and histograms rendered in the Prometheus text format,
+so /metrics can be scraped without a client library. Each process records
+in memory; a registry shared through a SQLite file adds every worker's
+changes there, so a scrape of any worker reports the totals of all of them.
+"""
+
+import atexit
+import bisect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Prometheus client defaults, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds between a worker's writes to the shared store
+FLUSH_INTERVAL = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sample (
+    metric TEXT NOT NULL,
+    labels TEXT NOT NULL,  -- JSON list of label values
+    slot INTEGER NOT NULL,  -- 0 for counters; bucket counts, +Inf count, then sum for histograms
+    value REAL NOT NULL,
+    PRIMARY KEY (metric, labels, slot)
+)
+"""
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def snapshot(self):
+        """Return {labels: [value]}, the form kept in the shared store"""
+        with self._lock:
+            return {labels: [value] for labels, value in self._values.items()}
+
+    def samples(self, series=None):
+        series = self.snapshot() if series is None else series
+        for labels, (value,) in sorted(series.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+class Histogram:
+    """Cumulative-bucket histogram per label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def snapshot(self):
+        """Return {labels: [per-bucket counts..., +Inf count, sum]}"""
+        with self._lock:
+            return {labels: list(series) for labels, series in self._series.items()}
+
+    def samples(self, series=None):
+        series = self.snapshot() if series is None else series
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _number(bound)
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', le)])} {_number(cumulative)}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(values[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {_number(cumulative)}"
+
+class MetricsStore:
+    """Metric totals of every process, summed in a SQLite file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            # One connection per thread, and none inherited across fork
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(SCHEMA)
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    def add(self, deltas):
+        """Add (metric, labels, slot, delta) rows to the totals in one transaction"""
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT INTO sample (metric, labels, slot, value) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (metric, labels, slot) DO UPDATE SET value = value + excluded.value',
+                [(metric, json.dumps(labels), slot, delta) for metric, labels, slot, delta in deltas])
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def load(self):
+        """Return {metric: {labels: [values by slot]}}"""
+        totals = {}
+        rows = self._connection().execute('SELECT metric, labels, slot, value FROM sample ORDER BY slot')
+        for metric, labels, slot, value in rows:
+            values = totals.setdefault(metric, {}).setdefault(tuple(json.loads(labels)), [])
+            values.extend([0] * (slot + 1 - len(values)))
+            values[slot] = value
+        return totals
+
+class Registry:
+    """Named collection of metrics.
+
+    Until share() is called, render() reports this process only. A shared
+    registry adds the changes since its last flush to the store every
+    FLUSH_INTERVAL seconds and before rendering, and renders the store's
+    totals, so every worker's requests are counted whichever one is scraped.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.store = None
+        self._flushed = {}  # metric name -> snapshot already added to the store
+        self._flush_lock = threading.Lock()
+        self._flusher_pid = None
+
+    def counter(self, *args, **kwargs):
+        return self._register(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self._register(Histogram(*args, **kwargs))
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def share(self, path):
+        """Aggregate this registry across processes through the SQLite file at path.
+
+        Call it before forking workers: what this process recorded so far is
+        flushed now, so forked workers do not add it again.
+        """
+        self.store = MetricsStore(path)
+        self.flush()
+
+    def flush(self):
+        """Add the changes since the last flush to the shared store"""
+        if self.store is None:
+            return
+        with self._flush_lock:
+            deltas = []
+            snapshots = {}
+            for metric in self.metrics:
+                snapshot = snapshots[metric.name] = metric.snapshot()
+                flushed = self._flushed.get(metric.name, {})
+                for labels, values in snapshot.items():
+                    previous = flushed.get(labels, [0] * len(values))
+                    deltas.extend((metric.name, labels, slot, value - previous[slot])
+                                  for slot, value in enumerate(values) if value != previous[slot])
+            if deltas:
+                self.store.add(deltas)
+            self._flushed = snapshots
+
+    def start_flusher(self):
+        """Flush from a daemon thread every FLUSH_INTERVAL seconds and at exit.
+
+        Cheap to call on every request: the thread is started once per
+        process, so a worker forked from a preloaded master starts its own.
+        """
+        if self.store is None or self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_forever, daemon=True).start()
+        atexit.register(self.flush)
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Kept for the next flush
+                logging.getLogger('passflow.metrics').warning('Could not flush metrics', exc_info=True)
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format"""
+        totals = None
+        if self.store is not None:
+            self.flush()
+            totals = self.store.load()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(None if totals is None else totals.get(metric.name, {})))
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    'passflow_http_request_duration_seconds', 'Time spent handling a request', ('endpoint', 'method'))
+RESPONSES = REGISTRY.counter(
+    'passflow_http_responses_total', 'Responses sent', ('endpoint', 'status'))
+REQUEST_QUERIES = REGISTRY.histogram(
+    'passflow_http_request_sql_queries', 'SQL statements executed per request', ('endpoint',),
+    buckets=COUNT_BUCKETS)
+SQL_QUERY_LATENCY = REGISTRY.histogram(
+    'passflow_sql_query_duration_seconds', 'Time spent in a single SQL statement', ('endpoint',),
+    buckets=QUERY_BUCKETS)
+TEMPLATE_RENDER = REGISTRY.histogram(
+    'passflow_template_render_seconds', 'Time spent rendering a template', ('template',))
+OPERATION_LATENCY = REGISTRY.histogram(
+    'passflow_operation_duration_seconds', 'Time spent in expensive operations (QR codes, images, bcrypt)',
+    ('operation',))
+THROTTLED = REGISTRY.counter(
+    'passflow_throttled_requests_total', 'Login/registration attempts rejected by the rate limiter',
+    ('action', 'scope'))
+
+@contextmanager
+def timed(operation):
+    """Record the duration of a block, or of every call when used as a decorator"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        OPERATION_LATENCY.observe(time.perf_counter() - started, operation)
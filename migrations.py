@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Schema migrations for PassFlow
+Brings existing databases up to the current schema: db.create_all() only
+creates missing tables, so indexes and columns added to live tables go
+through the numbered migrations below
+"""
+
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+def create_index(connection, name, table, columns, unique=False):
+    """Create an index if it does not exist yet"""
+    column_list = ', '.join(columns)
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+    connection.execute(text(f'CREATE {kind} IF NOT EXISTS {name} ON "{table}" ({column_list})'))
+
+def add_column(connection, table, name, ddl):
+    """Add a column to an existing table unless it is already there"""
+    existing = {column['name'] for column in inspect(connection).get_columns(table)}
+    if name not in existing:
+        connection.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {name} {ddl}'))
+
+def migration_001_hot_path_indexes(connection):
+    """Indexes matching the hot filters and orderings"""
+    # Pending/Approved counts and lists, newest first
+    create_index(connection, 'ix_pass_status_created_at', 'pass', ['status', 'created_at'])
+    # Expiry alerts: expiry_date = ? AND status = 'Approved'
+    create_index(connection, 'ix_pass_expiry_date_status', 'pass', ['expiry_date', 'status'])
+    # Student dashboard: latest pass of a user
+    create_index(connection, 'ix_pass_user_id_created_at', 'pass', ['user_id', 'created_at'])
+    create_index(connection, 'ix_payment_created_at', 'payment', ['created_at'])
+    create_index(connection, 'ix_payment_pass_id', 'payment', ['pass_id'])
+    create_index(connection, 'ix_user_role', 'user', ['role'])
+    # user.profile is loaded on nearly every request
+    create_index(connection, 'ix_profile_user_id', 'profile', ['user_id'])
+    create_index(connection, 'ix_notification_log_created_at', 'notification_log', ['created_at'])
+    # Expiry alerts: already-sent check per pass and alert configuration
+    create_index(connection, 'ix_notification_log_pass_id_alert_config_id', 'notification_log',
+                 ['pass_id', 'alert_config_id'])
+
+def migration_002_payment_idempotency_key(connection):
+    """Idempotency key making repeated payment submits return the same pass"""
+    add_column(connection, 'payment', 'idempotency_key', 'VARCHAR(64)')
+    create_index(connection, 'uq_payment_idempotency_key', 'payment', ['idempotency_key'], unique=True)
+
+def migration_003_catalog_version(connection):
+    """Seed the single route/pricing data version row"""
+    connection.execute(
+        text('INSERT INTO catalog_version (id, version, updated_at) '
+             'SELECT 1, 0, :now WHERE NOT EXISTS (SELECT 1 FROM catalog_version WHERE id = 1)'),
+        {'now': datetime.utcnow()}
+    )
+
+def migration_004_expiry_sweep_index(connection):
+    """Index for the nightly sweep: status = 'Approved' AND expiry_date < ?"""
+    create_index(connection, 'ix_pass_status_expiry_date', 'pass', ['status', 'expiry_date'])
+
+# (version, description, function) - append only, never renumber
+MIGRATIONS = [
+    (1, 'Hot-path indexes', migration_001_hot_path_indexes),
+    (2, 'Payment idempotency key', migration_002_payment_idempotency_key),
+    (3, 'Catalog version row', migration_003_catalog_version),
+    (4, 'Expiry sweep index', migration_004_expiry_sweep_index),
+]
+
+def ensure_migration_table(connection):
+    """Create the table recording applied migrations"""
+    connection.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_migration ('
+        'version INTEGER PRIMARY KEY, '
+        'description VARCHAR(200) NOT NULL, '
+        'applied_at DATETIME NOT NULL)'
+    ))
+
+def get_schema_version(connection):
+    """Return the highest applied migration version (0 if none)"""
+    ensure_migration_table(connection)
+    return connection.execute(text('SELECT COALESCE(MAX(version), 0) FROM schema_migration')).scalar()
+
+def upgrade_database(engine, metadata):
+    """Create missing tables, then apply pending migrations in order.
+
+    Each migration runs in its own transaction together with its
+    schema_migration row, so a failed migration leaves the previous version
+    intact. Returns the list of applied versions.
+    """
+    metadata.create_all(engine)
+
+    applied = []
+    with engine.begin() as connection:
+        current = get_schema_version(connection)
+
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(
+                text('INSERT INTO schema_migration (version, description, applied_at) '
+                     'VALUES (:version, :description, :applied_at)'),
+                {'version': version, 'description': description, 'applied_at': datetime.utcnow()}
+            )
+        applied.append(version)
+        print(f"✓ Applied migration {version}: {description}")
+
+    return applied
+
+if __name__ == '__main__':
+    from app_complete import app, db
+
+    with app.app_context():
+        applied = upgrade_database(db.engine, db.metadata)
+        with db.engine.connect() as connection:
+            version = get_schema_version(connection)
+    if not applied:
+        print(f"Database is up to date (schema version {version})")
+    else:
+        print(f"Database upgraded to schema version {version}")
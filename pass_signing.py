@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Signed pass QR payloads for PassFlow
+A payload carries the pass id, pass number, expiry date and status with a
+truncated HMAC-SHA256, so a scanner holding the key can check a pass
+without a database lookup:
+
+    PF1.<pass id>.<pass no>.<expiry YYYYMMDD>.<status>.<signature>
+"""
+
+import base64
+import hashlib
+import hmac
+from datetime import date, datetime
+
+VERSION = 'PF1'
+SIGNATURE_BYTES = 16  # 128-bit tag; 22 base64url characters
+
+STATUS_CODES = {'Approved': 'A', 'Pending': 'P', 'Rejected': 'R', 'Expired': 'E'}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+def derive_key(secret, purpose='pass-qr'):
+    """Derive a dedicated signing key from the app secret"""
+    return hmac.new(secret.encode('utf-8'), purpose.encode('utf-8'), hashlib.sha256).digest()
+
+class PassSigner:
+    """Signs and verifies pass payloads with one key"""
+
+    def __init__(self, key):
+        self._mac = hmac.new(key, digestmod=hashlib.sha256)
+
+    def _signature(self, message):
+        mac = self._mac.copy()
+        mac.update(message.encode('ascii'))
+        return base64.urlsafe_b64encode(mac.digest()[:SIGNATURE_BYTES]).rstrip(b'=').decode('ascii')
+
+    def sign(self, pass_id, pass_no, expiry_date, status):
+        """Return the QR payload for a pass"""
+        message = f"{VERSION}.{pass_id}.{pass_no or '-'}.{expiry_date:%Y%m%d}.{STATUS_CODES.get(status, '?')}"
+        return f"{message}.{self._signature(message)}"
+
+    def verify(self, payload, today=None):
+        """Return a result dict with 'valid' and 'reason' (ok, malformed, bad_signature,
+        not_approved or expired) plus the pass fields once the signature checks out"""
+        # Scanners may send anything; only ASCII payloads can carry a valid signature
+        parts = payload.split('.') if isinstance(payload, str) and payload.isascii() else []
+        if len(parts) != 6 or parts[0] != VERSION or not (parts[1].isascii() and parts[1].isdigit()):
+            return {'valid': False, 'reason': 'malformed'}
+
+        message, signature = payload.rpartition('.')[::2]
+        if not hmac.compare_digest(signature, self._signature(message)):
+            return {'valid': False, 'reason': 'bad_signature'}
+
+        try:
+            expiry = datetime.strptime(parts[3], '%Y%m%d').date()
+        except ValueError:
+            return {'valid': False, 'reason': 'malformed'}
+        result = {'pass_id': int(parts[1]), 'pass_no': parts[2], 'expiry_date': expiry.isoformat(),
+                  'status': STATUS_NAMES.get(parts[4], 'Unknown')}
+
+        if parts[4] != STATUS_CODES['Approved']:
+            result.update(valid=False, reason='not_approved')
+        elif expiry < (today or date.today()):
+            result.update(valid=False, reason='expired')
+        else:
+            result.update(valid=True, reason='ok')
+        return result
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Development-mode SQL detector for PassFlow
+Tracks the statements of one request, flags query shapes that repeat (the
+signature of a lazy relationship loaded in a loop) and logs slow statements
+with their SQLite query plan. Enabled with QUERY_DEBUG=1; never in production.
+"""
+
+import logging
+import re
+import sqlite3
+
+logger = logging.getLogger('passflow.queries')
+
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+def query_shape(statement):
+    """Statement with whitespace collapsed and IN (?, ?, ...) lists of any length folded"""
+    return _IN_LIST.sub('(?...)', _WHITESPACE.sub(' ', statement).strip())
+
+def explain_query_plan(dbapi_connection, statement, parameters):
+    """Return SQLite's plan for a SELECT as text lines, or [] if unavailable"""
+    if not isinstance(dbapi_connection, sqlite3.Connection) or not statement.lstrip().upper().startswith('SELECT'):
+        return []
+    try:
+        rows = dbapi_connection.execute('EXPLAIN QUERY PLAN ' + statement, parameters or ()).fetchall()
+    except sqlite3.Error:
+        return []
+    return [row[-1] for row in rows]
+
+class QueryTracker:
+    """Statements seen during one request"""
+
+    def __init__(self, slow_ms=100, repeat_threshold=5):
+        self.slow_ms = slow_ms
+        self.repeat_threshold = repeat_threshold
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes = {}  # shape -> executions
+        self.slow = 0
+
+    def record(self, dbapi_connection, statement, parameters, elapsed, executemany=False):
+        elapsed_ms = elapsed * 1000
+        self.count += 1
+        self.total_ms += elapsed_ms
+        shape = query_shape(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+        if elapsed_ms >= self.slow_ms:
+            self.slow += 1
+            plan = [] if executemany else explain_query_plan(dbapi_connection, statement, parameters)
+            logger.warning("Slow query (%.1f ms): %s%s", elapsed_ms, shape,
+                           ''.join(f"\n    plan: {line}" for line in plan))
+
+    def repeated(self):
+        """[(shape, executions)] for shapes run at least repeat_threshold times, most frequent first"""
+        return sorted(((shape, n) for shape, n in self.shapes.items() if n >= self.repeat_threshold),
+                      key=lambda item: -item[1])
+
+    def report(self, endpoint):
+        """Log repeated shapes and return the summary for the X-Query-Debug header"""
+        repeated = self.repeated()
+        for shape, executions in repeated:
+            logger.warning("Possible N+1 in %s: %d executions of %s", endpoint, executions, shape)
+        return (f"queries={self.count}; time_ms={self.total_ms:.1f}; "
+                f"repeated={len(repeated)}; slow={self.slow}")
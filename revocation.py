@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Compact pass revocation lists for PassFlow
+Revoked pass ids are kept sorted and stored as varint-encoded gaps (about
+one byte per id for dense ids), so conductor devices can hold the whole
+list and sync changes between versions in a few bytes
+"""
+
+import base64
+import bisect
+
+def encode_ids(ids):
+    """Encode sorted, distinct non-negative ints as LEB128 varints of the gaps"""
+    out = bytearray()
+    previous = 0
+    for value in ids:
+        gap = value - previous
+        previous = value
+        while gap >= 0x80:
+            out.append((gap & 0x7F) | 0x80)
+            gap >>= 7
+        out.append(gap)
+    return bytes(out)
+
+def decode_ids(data):
+    """Inverse of encode_ids; returns a sorted list"""
+    ids = []
+    value = shift = previous = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += value
+        ids.append(previous)
+        value = shift = 0
+    return ids
+
+def to_text(ids):
+    """Encoded ids as unpadded base64url, for JSON"""
+    return base64.urlsafe_b64encode(encode_ids(ids)).rstrip(b'=').decode('ascii')
+
+def from_text(text):
+    return decode_ids(base64.urlsafe_b64decode(text + '=' * (-len(text) % 4)))
+
+def diff(old_ids, new_ids):
+    """Return (added, removed) sorted lists between two id lists"""
+    old, new = set(old_ids), set(new_ids)
+    return sorted(new - old), sorted(old - new)
+
+def contains(sorted_ids, pass_id):
+    """Binary search membership test on a decoded list"""
+    index = bisect.bisect_left(sorted_ids, pass_id)
+    return index < len(sorted_ids) and sorted_ids[index] == pass_id
+
+def apply_delta(ids, added, removed):
+    """Bring a device's sorted list up to date with a delta from the server"""
+    return sorted(set(ids).difference(removed).union(added))
@@ -6,18 +6,19 @@ Run this script to set up the project with sample data
 
 import os
 import sys
-from app_complete import app, db, User, Profile, Route, Pricing, Pass, Payment, bcrypt
+from app_complete import app, db, User, Profile, Route, Pricing, Pass, Payment, bcrypt, configure_app_logging
+from migrations import upgrade_database
 
 # Excel file location
 EXCEL_FILE_PATH = 'routes and price data.xlsx'
 
 def setup_database():
     """Initialize database and create sample data"""
-print("Setting up PassFlow...")
+    print("Setting up PassFlow...")
     
     with app.app_context():
-        # Create all tables
-        db.create_all()
+        # Create all tables and apply pending migrations
+        upgrade_database(db.engine, db.metadata)
         print("✓ Database tables created")
         
         # Create default admin user
@@ -94,7 +95,7 @@ print("Setting up PassFlow...")
             db.session.commit()
             print("✓ Sample route data added")
         
-print("\n🚌 PassFlow setup complete!")
+        print("\n🚌 PassFlow setup complete!")
         print("\nTo run the application:")
         print("1. Install dependencies: pip install -r requirements.txt")
         print("2. Run the app: python app_complete.py")
@@ -103,4 +104,5 @@ print("\n🚌 PassFlow setup complete!")
         print("\nAccess the application at: http://127.0.0.1:5000")
 
 if __name__ == '__main__':
+    configure_app_logging()
     setup_database()
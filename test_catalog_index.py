@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory catalog indexes
+"""
+
+import random
+
+from catalog_index import LocationIndex, StopIndex, collect_stops, haversine_m, normalize_name
+
+def make_stops(count, seed=7):
+    """Return random stops scattered around Kolhapur"""
+    rng = random.Random(seed)
+    return [{'name': f'Stop {i}', 'lat': 16.7 + rng.uniform(-0.2, 0.2), 'lng': 74.24 + rng.uniform(-0.2, 0.2),
+             'price': None, 'routes': []} for i in range(count)]
+
+def test_nearest_matches_brute_force():
+    stops = make_stops(500)
+    index = StopIndex(stops)
+    rng = random.Random(11)
+    for _ in range(50):
+        lat, lng = 16.7 + rng.uniform(-0.25, 0.25), 74.24 + rng.uniform(-0.25, 0.25)
+        expected = sorted(stops, key=lambda s: haversine_m(lat, lng, s['lat'], s['lng']))[:5]
+        found = [stop for _, stop in index.nearest(lat, lng, k=5)]
+        assert [s['name'] for s in found] == [s['name'] for s in expected]
+
+def test_nearest_with_few_stops():
+    assert StopIndex([]).nearest(16.7, 74.2) == []
+    stops = make_stops(3)
+    assert len(StopIndex(stops).nearest(16.7, 74.2, k=10)) == 3
+
+def test_collect_stops_merges_shared_stops():
+    routes = [
+        {'id': 1, 'name': 'A', 'bus_number': 'BUS01', 'stops': [{'name': 'Shared', 'lat': 16.7, 'lng': 74.2}]},
+        {'id': 2, 'name': 'B', 'bus_number': 'BUS02', 'stops': [{'name': 'Shared', 'lat': 16.7, 'lng': 74.2},
+                                                                  {'name': 'Other', 'lat': 16.8, 'lng': 74.3}]},
+    ]
+    stops = collect_stops(routes, {'Shared': 1200.0})
+    shared = next(stop for stop in stops if stop['name'] == 'Shared')
+    assert len(stops) == 2
+    assert shared['price'] == 1200.0
+    assert [route['id'] for route in shared['routes']] == [1, 2]
+
+def make_locations():
+    names = ['Kolhapur', 'Shivaji Nagar Kolhapur', 'Kagal', 'Ichalkaranji', 'Jaysingpur', 'Rajarampuri 5th Lane']
+    return LocationIndex([{'location': name, 'price': 1000.0 + i} for i, name in enumerate(names)])
+
+def test_search_ranks_exact_then_prefix_then_word_prefix():
+    index = make_locations()
+    assert [entry['location'] for _, entry in index.search('kolhapur')] == ['Kolhapur', 'Shivaji Nagar Kolhapur']
+    assert [entry['location'] for _, entry in index.search('ka')] == ['Kagal']
+    assert index.search('nagar')[0][1]['location'] == 'Shivaji Nagar Kolhapur'
+
+def test_search_tolerates_typos():
+    index = make_locations()
+    assert index.search('ichalkarangi')[0][1]['location'] == 'Ichalkaranji'
+    assert index.search('zzzz') == []
+
+def test_lookup_ignores_case_and_punctuation():
+    index = make_locations()
+    assert index.lookup('rajarampuri  5th-lane')['location'] == 'Rajarampuri 5th Lane'
+    assert index.lookup('Rajarampuri') is None
+
+def test_normalize_name_is_unicode_aware():
+    # templates/create_pass.html mirrors this with /[^\p{L}\p{N}]+/gu
+    assert normalize_name('  Café—Pune (Stand) ') == 'café pune stand'
+    assert normalize_name('ÉCOLE_12') == 'école 12'
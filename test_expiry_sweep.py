@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Tests for the nightly set-based pass expiry sweep
+"""
+
+from datetime import date
+
+def test_sweep_expires_past_passes_in_one_update(app, scale_data, count_queries):
+    from app_complete import Pass, expire_passes
+
+    today = date.today()
+    with app.app_context():
+        due = Pass.query.filter(Pass.status == 'Approved', Pass.expiry_date < today).count()
+        active = Pass.query.filter(Pass.status == 'Approved', Pass.expiry_date >= today).count()
+    assert due > 0 and active > 0
+
+    with count_queries() as statements:
+        assert expire_passes(today) == due
+    assert [statement.split()[0] for statement in statements] == ['UPDATE']
+    assert expire_passes(today) == 0
+
+    with app.app_context():
+        assert Pass.query.filter_by(status='Approved').count() == active
+        assert Pass.query.filter(Pass.status == 'Expired', Pass.expiry_date >= today).count() == 0
+
+def test_pass_printing_counts_by_status(app, admin_client):
+    from app_complete import Pass, expire_passes
+
+    expire_passes()
+    with app.app_context():
+        expired = Pass.query.filter_by(status='Expired').count()
+    page = admin_client.get('/admin/print_passes').get_data(as_text=True)
+    assert f'<h3>{expired}</h3>\n                                <p class="mb-0">Expired Passes</p>' in page
+    assert '<option value="Expired">' in page
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the Jinja fragment cache
+"""
+
+from jinja2 import Environment
+
+from fragment_cache import FragmentCache, LazySequence
+
+def make_environment():
+    environment = Environment(extensions=['fragment_cache.FragmentCacheExtension'])
+    environment.data_version = 1
+    environment.fragment_cache_version = lambda: environment.data_version
+    return environment
+
+def test_fragment_renders_once_per_version():
+    environment = make_environment()
+    template = environment.from_string("{% cache 'items' %}{{ items|join(',') }}{% endcache %}")
+
+    assert template.render(items=[1, 2]) == '1,2'
+    assert template.render(items=[3]) == '1,2'  # Served from the cache
+
+    environment.data_version = 2
+    assert template.render(items=[3]) == '3'
+
+def test_extra_key_values_separate_fragments():
+    environment = make_environment()
+    template = environment.from_string("{% cache 'row', row_id %}{{ label }}{% endcache %}")
+
+    assert template.render(row_id=1, label='a') == 'a'
+    assert template.render(row_id=2, label='b') == 'b'
+    assert template.render(row_id=1, label='c') == 'a'
+
+def test_lru_evicts_least_recently_used():
+    cache = FragmentCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+def test_lazy_sequence_loads_only_on_cache_miss():
+    environment = make_environment()
+    template = environment.from_string("{% cache 'items' %}{{ items|length }}:{% for i in items %}{{ i }}{% endfor %}{% endcache %}")
+    loads = []
+
+    def load():
+        loads.append(1)
+        return [1, 2]
+
+    assert template.render(items=LazySequence(load)) == '2:12'
+    assert template.render(items=LazySequence(load)) == '2:12'
+    assert len(loads) == 1
+
+def test_catalog_pages_skip_catalog_queries_on_cache_hit(admin_client, student_client, count_queries):
+    for client, url in ((admin_client, '/admin/routes'), (admin_client, '/admin/data_management'),
+                        (student_client, '/route_map')):
+        client.get(url)  # Fill the fragment cache
+        with count_queries() as statements:
+            assert client.get(url).status_code == 200
+        catalog = [s for s in statements if 'FROM route' in s or 'FROM pricing' in s]
+        assert catalog == [], f'{url}: {catalog}'
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for reading and parsing the routes and price workbook
+"""
+
+from import_data import SHEET_NAME, parse_workbook
+
+# Sheet rows in the layout of the real workbook: a title and a header row,
+# then per route a "<name> Route No. <n>" row followed by its stations
+ROWS = [
+    ['Monthly Price', None, None, None, None],
+    ['', 'Sr. No.', 'Station', 'Km', 'Price'],
+    [None, 'Kolhapur Route No. 1', None, None, None],
+    [None, 1, 'Rajarampuri', 4, 1200],
+    [None, 3, 'Shahupuri', 6.5, 1350.5],
+    [None, 2, 'Tarabai Park', 5, '1300'],
+    [None, 4, 'SIT COE', 12, 1800],
+    [None, None, None, None, None],
+    [None, 'Ichalkaranji Route No. 12', None, None, None],
+    [None, 1, ' Ichalkaranji ', 30, 2500],
+    [None, 2, 'Rajarampuri', 4, 1250],
+    [None, 3, 'Hatkanangale', 20, 0],
+    [None, 'x', 'Not a stop', None, 900],
+    [None, 'Empty Route No. 3', None, None, None],
+]
+
+def write_workbook(path, rows=ROWS):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = SHEET_NAME
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    return str(path)
+
+def test_stream_and_pandas_readers_agree(tmp_path):
+    path = write_workbook(tmp_path / 'routes.xlsx')
+
+    parsed = parse_workbook(path, reader='stream')
+    assert parse_workbook(path, reader='pandas') == parsed
+
+    assert [(route['name'], route['bus_number'], [stop['name'] for stop in route['stops']])
+            for route in parsed['routes']] == [
+        ('Kolhapur - Route 1', 'BUS01', ['Rajarampuri', 'Tarabai Park', 'Shahupuri']),
+        ('Ichalkaranji - Route 12', 'BUS12', ['Ichalkaranji', 'Rajarampuri']),
+    ]
+    assert parsed['pricing'] == {'Rajarampuri': 1200.0, 'Shahupuri': 1350.5, 'Tarabai Park': 1300.0,
+                                 'Ichalkaranji': 2500.0}
+
+def test_unknown_reader_is_rejected(tmp_path):
+    import pytest
+    from import_data import iter_sheet_rows
+
+    with pytest.raises(ValueError):
+        next(iter_sheet_rows(write_workbook(tmp_path / 'routes.xlsx'), reader='csv'))
+
+def counting_parses(monkeypatch):
+    """Patch import_data.parse_workbook to record each real parse"""
+    import import_data
+
+    calls = []
+    parse = import_data.parse_workbook
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return parse(*args, **kwargs)
+
+    monkeypatch.setattr(import_data, 'parse_workbook', counted)
+    return calls
+
+def test_cache_hits_when_size_and_mtime_match(tmp_path, monkeypatch):
+    import os
+    from import_data import CACHE_SUFFIX, load_parsed_workbook
+
+    path = write_workbook(tmp_path / 'routes.xlsx')
+    parses = counting_parses(monkeypatch)
+    parsed = load_parsed_workbook(path)
+    assert os.path.exists(path + CACHE_SUFFIX)
+
+    assert load_parsed_workbook(path) == parsed
+    # A touched but identical workbook is re-hashed, not re-parsed
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+    assert load_parsed_workbook(path) == parsed
+    assert len(parses) == 1
+
+def test_changed_workbook_is_reparsed(tmp_path, monkeypatch):
+    import os
+    from import_data import load_parsed_workbook
+
+    path = write_workbook(tmp_path / 'routes.xlsx')
+    parses = counting_parses(monkeypatch)
+    before = load_parsed_workbook(path)
+
+    mtime_ns = os.stat(path).st_mtime_ns
+    write_workbook(path, ROWS[:3] + [[None, 1, 'Rajarampuri', 4, 1500]])
+    os.utime(path, ns=(0, mtime_ns + 10**9))
+    after = load_parsed_workbook(path)
+    assert after != before
+    assert after['pricing'] == {'Rajarampuri': 1500.0}
+    assert len(parses) == 2
+
+def test_unreadable_cache_falls_back_to_parse(tmp_path, monkeypatch):
+    from import_data import CACHE_MAGIC, CACHE_SUFFIX, load_parsed_workbook
+
+    path = write_workbook(tmp_path / 'routes.xlsx')
+    parses = counting_parses(monkeypatch)
+    parsed = load_parsed_workbook(path)
+    with open(path + CACHE_SUFFIX, 'rb') as f:
+        cached = f.read()
+
+    for junk in (b'PFWC0' + cached[len(CACHE_MAGIC):], CACHE_MAGIC + b'not zlib', cached[:len(cached) // 2]):
+        with open(path + CACHE_SUFFIX, 'wb') as f:
+            f.write(junk)
+        assert load_parsed_workbook(path) == parsed
+    assert len(parses) == 4
+    # The last parse rewrote a readable cache
+    assert load_parsed_workbook(path) == parsed
+    assert len(parses) == 4
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for catalog imports: the import page, apply progress and the
+workbook-to-database diff
+"""
+
+def test_import_page_starts_no_job(app, admin_client):
+    from app_complete import ImportJob
+
+    with app.app_context():
+        jobs = ImportJob.query.count()
+    response = admin_client.get('/admin/import_data')
+    assert response.status_code == 200
+    assert 'name="dry_run" value="1"' in response.get_data(as_text=True)
+    with app.app_context():
+        assert ImportJob.query.count() == jobs
+
+def test_apply_reports_written_counts(app, scale_data):
+    from app_complete import IMPORT_PROGRESS_EVERY, apply_catalog_diff, db
+
+    diff = {'routes_add': [{'name': 'Test Route', 'bus_number': 'T1', 'stops': ['A', 'B']}],
+            'routes_update': [], 'routes_remove': [],
+            'pricing_add': [(f'Test Stop {i}', 10.0) for i in range(2 * IMPORT_PROGRESS_EVERY)],
+            'pricing_update': [], 'pricing_remove': []}
+    calls = []
+    with app.app_context():
+        apply_catalog_diff(diff, progress=lambda routes, prices: calls.append((routes, prices)))
+        db.session.rollback()
+
+    assert calls == [(1, IMPORT_PROGRESS_EVERY - 1), (1, 2 * IMPORT_PROGRESS_EVERY - 1),
+                     (1, 2 * IMPORT_PROGRESS_EVERY)]
+
+def write_workbook(path, prices):
+    """Write a one-route price sheet in the layout parse_rows expects"""
+    from openpyxl import Workbook
+    from import_data import SHEET_NAME
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = SHEET_NAME
+    sheet.append(['Monthly Price', None, None, None, None])
+    sheet.append(['', 'Sr. No.', 'Station', 'Km', 'Price'])
+    sheet.append([None, 'Test Route No. 1', None, None, None])
+    for sr_no, (station, price) in enumerate(prices.items(), 1):
+        sheet.append([None, sr_no, station, None, price])
+    workbook.save(path)
+    return str(path)
+
+def current_catalog():
+    """The parsed-workbook structure matching the database catalog"""
+    from app_complete import Pricing, Route
+
+    return {
+        'routes': [{'name': route.name, 'bus_number': route.bus_number, 'stops': route.get_stops()}
+                   for route in Route.query.order_by(Route.id)],
+        'pricing': {pricing.location: pricing.price for pricing in Pricing.query},
+        'rows': 0
+    }
+
+def test_unchanged_catalog_has_empty_diff(app, scale_data):
+    from app_complete import diff_catalog, summarize_catalog_diff
+
+    with app.app_context():
+        summary = summarize_catalog_diff(diff_catalog(current_catalog()))
+    assert set(summary.values()) == {0}
+
+def test_edited_price_gives_one_update(app, scale_data):
+    from app_complete import diff_catalog, summarize_catalog_diff
+
+    with app.app_context():
+        parsed = current_catalog()
+        location = sorted(parsed['pricing'])[0]
+        parsed['pricing'][location] += 100
+        diff = diff_catalog(parsed)
+
+    assert [(pricing.location, price) for pricing, price in diff['pricing_update']] == \
+        [(location, parsed['pricing'][location])]
+    summary = summarize_catalog_diff(diff)
+    assert summary.pop('pricing_updated') == 1
+    assert set(summary.values()) == {0}
+
+def test_removed_route_with_passes_is_retained(app, scale_data):
+    from app_complete import Pass, Route, db, diff_catalog
+
+    with app.app_context():
+        route = db.session.get(Route, db.session.query(Pass.route_id).first()[0])
+        parsed = current_catalog()
+        parsed['routes'] = [route_data for route_data in parsed['routes'] if route_data['name'] != route.name]
+        diff = diff_catalog(parsed)
+
+        assert diff['routes_retained'] == [route]
+        assert diff['routes_remove'] == []
+
+def test_duplicate_route_names_are_rejected(app, scale_data):
+    import pytest
+    from app_complete import diff_catalog
+
+    with app.app_context():
+        parsed = current_catalog()
+        parsed['routes'].append(dict(parsed['routes'][0], bus_number='BUS99'))
+        with pytest.raises(ValueError, match=parsed['routes'][0]['name']):
+            diff_catalog(parsed)
+
+def test_dry_run_writes_nothing(app, scale_data, count_queries, tmp_path):
+    from app_complete import DataImport, Pricing, Route, import_catalog
+
+    path = write_workbook(tmp_path / 'routes.xlsx', {'Test Stop A': 1200, 'Test Stop B': 1500})
+    with app.app_context():
+        counts = (Route.query.count(), Pricing.query.count(), DataImport.query.count())
+        with count_queries() as statements:
+            report = import_catalog(path, dry_run=True)
+        assert (Route.query.count(), Pricing.query.count(), DataImport.query.count()) == counts
+
+    assert report['summary']['routes_added'] == 1
+    assert report['summary']['pricing_added'] == 2
+    assert not [statement for statement in statements
+                if statement.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))]
+
+def test_same_workbook_hash_is_skipped(app, scale_data, monkeypatch, tmp_path):
+    import import_data
+    from app_complete import DataImport, db, import_catalog
+
+    path = write_workbook(tmp_path / 'routes.xlsx', {'Test Stop A': 1200})
+
+    def parse(*args, **kwargs):
+        raise AssertionError('unchanged workbook was parsed')
+
+    with app.app_context():
+        last_import = DataImport(workbook_hash=import_data.workbook_fingerprint(path))
+        db.session.add(last_import)
+        db.session.commit()
+        monkeypatch.setattr(import_data, 'load_parsed_workbook', parse)
+        try:
+            report = import_catalog(path)
+        finally:
+            db.session.delete(last_import)
+            db.session.commit()
+
+    assert report['unchanged'] is True
+    assert report['diff'] is None
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Tests for the location catalog used by the create pass page
+"""
+
+def test_catalog_matches_routes_by_location(app, student_client):
+    from app_complete import Pricing, Route
+
+    catalog = student_client.get('/api/location_catalog.json').get_json()
+    with app.app_context():
+        served = {stop['name'] for route in Route.query.all() for stop in route.get_stops()}
+        locations = sorted(served.intersection(location for (location,) in Pricing.query.with_entities(Pricing.location)))
+    assert locations
+
+    for location in locations[:5]:
+        routes = student_client.get(f'/api/routes_by_location/{location}').get_json()
+        price, route_ids = catalog['locations'][location]
+        assert sorted(route_ids) == sorted(route['id'] for route in routes)
+        for route in routes:
+            name, bus_number, stop_names = catalog['routes'][str(route['id'])]
+            assert (name, bus_number, stop_names) == \
+                (route['name'], route['bus_number'], [stop['name'] for stop in route['stops']])
+
+def test_versioned_url_may_be_cached(app, student_client):
+    from app_complete import get_catalog_version
+
+    with app.app_context():
+        version = get_catalog_version()
+
+    response = student_client.get(f'/api/location_catalog.json?v={version}')
+    assert response.headers['Cache-Control'] == 'private, max-age=86400'
+    assert response.get_json()['version'] == version
+    # An unversioned or stale URL must be revalidated
+    for url in ('/api/location_catalog.json', f'/api/location_catalog.json?v={version - 1}'):
+        assert student_client.get(url).headers['Cache-Control'] == 'private, no-cache'
+
+    not_modified = student_client.get('/api/location_catalog.json', headers={'If-None-Match': response.headers['ETag']})
+    assert not_modified.status_code == 304
+    assert not_modified.headers['Cache-Control'] == 'private, no-cache'
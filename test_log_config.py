@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for the queue-backed structured logging
+"""
+
+import io
+import json
+import logging
+
+import pytest
+
+from log_config import ROOT_LOGGER, SamplingFilter, configure_logging, parse_sample_rates, stop_logging
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    configure_logging('INFO', 'json', {'passflow.noisy': 0.0}, stream=stream)
+    yield stream
+    stop_logging()
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.handlers[:] = []
+    logger.setLevel(logging.NOTSET)
+    logger.propagate = True
+
+def read_records(stream):
+    stop_logging()  # Drains the queue
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+def test_records_are_written_as_json_with_extra_fields(log_stream):
+    logging.getLogger('passflow.notifications').info('Email sent', extra={'recipient': 'a@example.com'})
+    logging.getLogger('passflow.notifications').debug('Email body', extra={'body': 'hidden at INFO'})
+
+    records = read_records(log_stream)
+    assert len(records) == 1
+    assert records[0]['msg'] == 'Email sent'
+    assert records[0]['level'] == 'INFO'
+    assert records[0]['logger'] == 'passflow.notifications'
+    assert records[0]['recipient'] == 'a@example.com'
+
+def test_sampling_never_drops_warnings(log_stream):
+    noisy = logging.getLogger('passflow.noisy.child')
+    noisy.info('dropped')
+    noisy.warning('kept')
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        noisy.exception('failed')
+
+    records = read_records(log_stream)
+    assert [record['msg'] for record in records] == ['kept', 'failed']
+    assert 'ValueError: boom' in records[1]['exc']
+
+def test_parse_sample_rates():
+    assert parse_sample_rates('passflow.notifications=0.01, passflow.images=0.5') == {
+        'passflow.notifications': 0.01, 'passflow.images': 0.5}
+    assert parse_sample_rates('') == {}
+    assert SamplingFilter({}).filter(logging.makeLogRecord({'name': 'passflow.x', 'levelno': logging.INFO}))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus metrics primitives
+"""
+
+from metrics import Registry, OPERATION_LATENCY, timed
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram('demo_seconds', 'Demo latency', ('endpoint',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, 'home')
+
+    lines = registry.render().splitlines()
+    assert '# TYPE demo_seconds histogram' in lines
+    assert 'demo_seconds_bucket{endpoint="home",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{endpoint="home",le="1"} 3' in lines
+    assert 'demo_seconds_bucket{endpoint="home",le="+Inf"} 4' in lines
+    assert 'demo_seconds_sum{endpoint="home"} 4.05' in lines
+    assert 'demo_seconds_count{endpoint="home"} 4' in lines
+
+def test_counter_escapes_label_values():
+    registry = Registry()
+    counter = registry.counter('demo_total', 'Demo counter', ('path',))
+    counter.inc('say "hi"\n')
+    counter.inc('say "hi"\n', amount=2)
+
+    assert 'demo_total{path="say \\"hi\\"\\n"} 3' in registry.render().splitlines()
+
+def test_timed_records_each_call():
+    @timed('test_operation')
+    def work():
+        return 42
+
+    before = OPERATION_LATENCY.count('test_operation')
+    assert work() == 42
+    work()
+    assert OPERATION_LATENCY.count('test_operation') == before + 2
+
+def make_registry(path):
+    """A registry shaped like one worker's, sharing the store at path"""
+    registry = Registry()
+    counter = registry.counter('demo_total', 'Demo counter', ('endpoint',))
+    histogram = registry.histogram('demo_seconds', 'Demo latency', ('endpoint',), buckets=(0.1, 1.0))
+    registry.share(str(path))
+    return registry, counter, histogram
+
+def test_shared_registry_sums_workers(tmp_path):
+    first, first_counter, first_histogram = make_registry(tmp_path / 'metrics.db')
+    second, second_counter, second_histogram = make_registry(tmp_path / 'metrics.db')
+
+    first_counter.inc('home', amount=2)
+    first_histogram.observe(0.05, 'home')
+    second_counter.inc('home')
+    second_counter.inc('login')
+    second_histogram.observe(0.5, 'home')
+    second.flush()
+
+    lines = first.render().splitlines()
+    assert 'demo_total{endpoint="home"} 3' in lines
+    assert 'demo_total{endpoint="login"} 1' in lines
+    assert 'demo_seconds_bucket{endpoint="home",le="0.1"} 1' in lines
+    assert 'demo_seconds_count{endpoint="home"} 2' in lines
+    assert 'demo_seconds_sum{endpoint="home"} 0.55' in lines
+    # Flushes only add what changed since the last one
+    second.flush()
+    assert second.render() == first.render()
+
+def test_forked_worker_counts_once(tmp_path):
+    import os
+    import pytest
+
+    if not hasattr(os, 'fork'):
+        pytest.skip('needs fork')
+    registry, counter, _ = make_registry(tmp_path / 'metrics.db')
+    counter.inc('home')  # Recorded by the "master" before forking
+    registry.flush()
+
+    pid = os.fork()
+    if pid == 0:
+        counter.inc('home', amount=10)
+        registry.flush()
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert 'demo_total{endpoint="home"} 11' in registry.render().splitlines()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the schema migrations: query plans of the hot queries before and
+after the hot-path index migration
+"""
+
+from datetime import date
+
+from sqlalchemy import create_engine, func, inspect, select, text
+from sqlalchemy.pool import StaticPool
+
+from app_complete import db, User, Pass, Payment, NotificationLog
+from migrations import MIGRATIONS, get_schema_version, upgrade_database
+
+MIGRATION_1_INDEXES = [
+    'ix_pass_status_created_at', 'ix_pass_expiry_date_status', 'ix_pass_user_id_created_at',
+    'ix_payment_created_at', 'ix_payment_pass_id', 'ix_user_role', 'ix_profile_user_id',
+    'ix_notification_log_created_at', 'ix_notification_log_pass_id_alert_config_id'
+]
+MIGRATION_4_INDEXES = ['ix_pass_status_expiry_date']
+
+# Hot query shapes: (name, statement, expected index after migration). Where two
+# indexes serve a query equally well the planner's choice is left open between them
+HOT_QUERIES = [
+    ('admin student count',
+     select(func.count(User.id)).where(User.role == 'student'),
+     'ix_user_role'),
+    ('pending pass count',
+     select(func.count(Pass.id)).where(Pass.status == 'Pending'),
+     ('ix_pass_status_created_at', 'ix_pass_status_expiry_date')),
+    ('expiry alerts',
+     select(Pass.id).where(Pass.expiry_date == date(2026, 1, 1), Pass.status == 'Approved'),
+     ('ix_pass_expiry_date_status', 'ix_pass_status_expiry_date')),
+    ('expiry sweep',
+     select(Pass.id).where(Pass.status == 'Approved', Pass.expiry_date < date(2026, 1, 1)),
+     'ix_pass_status_expiry_date'),
+    ('dashboard latest pass',
+     select(Pass.id).where(Pass.user_id == 1).order_by(Pass.created_at.desc()).limit(1),
+     'ix_pass_user_id_created_at'),
+    ('admin payments',
+     select(Payment.id).order_by(Payment.created_at.desc()),
+     'ix_payment_created_at'),
+    ('recent notifications',
+     select(NotificationLog.id).order_by(NotificationLog.created_at.desc()).limit(20),
+     'ix_notification_log_created_at'),
+]
+
+def make_engine():
+    """Return an engine for a private in-memory database"""
+    return create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+
+def make_legacy_database():
+    """Return an engine holding the pre-migration schema (tables without indexes)"""
+    engine = make_engine()
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for name in MIGRATION_1_INDEXES + MIGRATION_4_INDEXES:
+            connection.execute(text(f'DROP INDEX {name}'))
+    return engine
+
+def query_plan(engine, statement):
+    """Return the EXPLAIN QUERY PLAN details of a statement as one string"""
+    sql = str(statement.compile(engine, compile_kwargs={'literal_binds': True}))
+    with engine.connect() as connection:
+        rows = connection.execute(text('EXPLAIN QUERY PLAN ' + sql)).fetchall()
+    return ' | '.join(row[-1] for row in rows)
+
+def expected_indexes(index):
+    return (index,) if isinstance(index, str) else index
+
+def test_hot_queries_scan_before_migration():
+    engine = make_legacy_database()
+    for name, statement, index in HOT_QUERIES:
+        plan = query_plan(engine, statement)
+        assert not any(index_name in plan for index_name in expected_indexes(index)), name
+        assert 'SCAN' in plan or 'TEMP B-TREE' in plan, f'{name}: {plan}'
+
+def test_hot_queries_use_indexes_after_migration():
+    engine = make_legacy_database()
+    assert upgrade_database(engine, db.metadata) == [version for version, _, _ in MIGRATIONS]
+
+    for name, statement, index in HOT_QUERIES:
+        plan = query_plan(engine, statement)
+        assert any(index_name in plan for index_name in expected_indexes(index)), f'{name}: {plan}'
+        assert 'TEMP B-TREE' not in plan, f'{name}: {plan}'
+
+def test_upgrade_is_idempotent():
+    engine = make_engine()
+    upgrade_database(engine, db.metadata)
+    assert upgrade_database(engine, db.metadata) == []
+
+    with engine.connect() as connection:
+        assert get_schema_version(connection) == MIGRATIONS[-1][0]
+    indexes = {index['name'] for table in ('pass', 'payment', 'user', 'profile', 'notification_log')
+               for index in inspect(engine).get_indexes(table)}
+    assert set(MIGRATION_1_INDEXES + MIGRATION_4_INDEXES) <= indexes
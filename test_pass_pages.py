@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the pass detail and print pages and their ETag fast path
+"""
+
+def student_pass_id(app, scale_data):
+    from app_complete import Pass
+
+    with app.app_context():
+        return Pass.query.filter_by(user_id=scale_data.student_id).order_by(Pass.id).first().id
+
+def test_signing_key_change_invalidates_print_page(app, scale_data, student_client, monkeypatch):
+    import app_complete
+    from pass_signing import PassSigner, derive_key
+
+    url = f'/pass/{student_pass_id(app, scale_data)}/print'
+    etag = student_client.get(url).headers['ETag']
+    assert student_client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    monkeypatch.setattr(app_complete, '_pass_signer', PassSigner(derive_key('rotated-secret')))
+    response = student_client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_matching_etag_returns_304_before_rendering(app, scale_data, student_client, count_queries, monkeypatch):
+    import app_complete
+
+    url = f'/pass/{student_pass_id(app, scale_data)}/print'
+    etag = student_client.get(url).headers['ETag']
+
+    def make_qr_data_url(*args, **kwargs):
+        raise AssertionError('QR code rendered for a 304')
+
+    monkeypatch.setattr(app_complete, 'make_qr_data_url', make_qr_data_url)
+    with count_queries() as statements:
+        response = student_client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.data == b''
+    # The pass row join and the catalog version, nothing for the page itself
+    assert len(statements) == 2
+    assert 'FROM pass JOIN user' in statements[0]
+
+def test_displayed_changes_give_new_etag(app, scale_data, student_client):
+    from datetime import timedelta
+    from app_complete import Pass, db
+
+    pass_id = student_pass_id(app, scale_data)
+    url = f'/pass/{pass_id}'
+    etags = [student_client.get(url).headers['ETag']]
+
+    def change(field, value):
+        with app.app_context():
+            bus_pass = db.session.get(Pass, pass_id)
+            target = bus_pass.user.profile if field == 'photo' else bus_pass
+            original = getattr(target, field)
+            setattr(target, field, value(original))
+            db.session.commit()
+        try:
+            response = student_client.get(url, headers={'If-None-Match': etags[0]})
+            assert response.status_code == 200
+            etags.append(response.headers['ETag'])
+        finally:
+            with app.app_context():
+                bus_pass = db.session.get(Pass, pass_id)
+                target = bus_pass.user.profile if field == 'photo' else bus_pass
+                setattr(target, field, original)
+                db.session.commit()
+
+    change('status', lambda status: 'Rejected' if status != 'Rejected' else 'Approved')
+    change('expiry_date', lambda expiry: expiry + timedelta(days=30))
+    change('photo', lambda photo: 'new-photo.jpg')
+
+    assert len(set(etags)) == 4
+    assert student_client.get(url, headers={'If-None-Match': etags[0]}).status_code == 304
+
+def test_pending_flashes_force_full_response(app, scale_data, student_client):
+    url = f'/pass/{student_pass_id(app, scale_data)}'
+    etag = student_client.get(url).headers['ETag']
+
+    with student_client.session_transaction() as session:
+        session['_flashes'] = [('success', 'Payment successful!')]
+    response = student_client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert 'Payment successful!' in response.get_data(as_text=True)
+
+def test_other_students_pass_gets_no_304(app, scale_data, student_client):
+    from app_complete import User
+    from conftest import logged_in_client
+
+    url = f'/pass/{student_pass_id(app, scale_data)}'
+    etag = student_client.get(url).headers['ETag']
+    with app.app_context():
+        other_id = User.query.filter(User.role == 'student', User.id != scale_data.student_id).first().id
+
+    response = logged_in_client(app, other_id, 'student').get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 302
+    assert 'ETag' not in response.headers
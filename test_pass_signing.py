@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for signed pass QR payloads and the batch verify API
+"""
+
+from datetime import date
+
+from pass_signing import PassSigner, derive_key
+
+SIGNER = PassSigner(derive_key('test-secret'))
+TODAY = date(2026, 6, 1)
+
+def test_signed_payload_verifies():
+    payload = SIGNER.sign(42, 'BP12345678', date(2026, 12, 31), 'Approved')
+
+    assert payload.startswith('PF1.42.BP12345678.20261231.A.')
+    assert SIGNER.verify(payload, TODAY) == {
+        'valid': True, 'reason': 'ok', 'pass_id': 42, 'pass_no': 'BP12345678',
+        'expiry_date': '2026-12-31', 'status': 'Approved'}
+
+def test_tampered_or_foreign_payloads_are_rejected():
+    payload = SIGNER.sign(42, 'BP12345678', date(2026, 12, 31), 'Approved')
+
+    assert SIGNER.verify(payload.replace('20261231', '20291231'), TODAY)['reason'] == 'bad_signature'
+    assert PassSigner(derive_key('other-secret')).verify(payload, TODAY)['reason'] == 'bad_signature'
+    assert SIGNER.verify('PASS:42:BP12345678:Approved', TODAY)['reason'] == 'malformed'
+    assert SIGNER.verify(None, TODAY)['reason'] == 'malformed'
+    for garbage in ('PF1.1.é.20260101.A.abc', payload[:-2] + 'é=', 'PF1.²3.BP1.20261231.A.abc'):
+        assert SIGNER.verify(garbage, TODAY) == {'valid': False, 'reason': 'malformed'}
+
+def test_expired_and_unapproved_passes_are_invalid():
+    expired = SIGNER.sign(7, 'BP1', date(2026, 5, 31), 'Approved')
+    pending = SIGNER.sign(8, 'BP2', date(2026, 12, 31), 'Pending')
+
+    assert SIGNER.verify(expired, TODAY)['reason'] == 'expired'
+    result = SIGNER.verify(pending, TODAY)
+    assert (result['valid'], result['reason'], result['status']) == (False, 'not_approved', 'Pending')
+
+def test_verify_api_needs_no_queries_with_token(app, scale_data, count_queries, monkeypatch):
+    from app_complete import get_pass_signer
+
+    monkeypatch.setenv('VERIFY_TOKEN', 'scanner-token')
+    payload = get_pass_signer().sign(1, 'BP1', date(2099, 1, 1), 'Approved')
+    client = app.test_client()
+    headers = {'Authorization': 'Bearer scanner-token'}
+    client.post('/api/passes/verify', json={'payloads': []}, headers=headers)  # Load and check the revocation list
+
+    with count_queries() as statements:
+        response = client.post('/api/passes/verify', json={'payloads': [payload, 'garbage', 'PF1.1.é.20260101.A.abc']},
+                               headers=headers)
+    assert statements == []  # Within REVOCATION_VERSION_CHECK of the warm-up call
+    assert [result['reason'] for result in response.get_json()['results']] == ['ok', 'malformed', 'malformed']
+
+    assert client.post('/api/passes/verify', json={'payloads': [payload]}).status_code == 403
+    assert client.post('/api/passes/verify', json={'payloads': 'x'}, headers=headers).status_code == 400
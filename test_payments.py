@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for idempotent pass payments
+"""
+
+from conftest import logged_in_client
+
+def start_purchase(app, client):
+    """Put a route selection in the session and return the idempotency key the gateway issues"""
+    from app_complete import Pricing, Route
+
+    with app.app_context():
+        route = Route.query.order_by(Route.id).first()
+        location = route.get_stops()[-1]['name']
+        amount = Pricing.query.filter_by(location=location).first().price
+    with client.session_transaction() as session:
+        session['pass_data'] = {'location': location, 'route_id': route.id, 'amount': amount}
+    assert client.get('/payment_gateway').status_code == 200
+    with client.session_transaction() as session:
+        return session['pass_data']['idempotency_key']
+
+def row_counts(app):
+    from app_complete import Pass, Payment
+
+    with app.app_context():
+        return Pass.query.count(), Payment.query.count()
+
+def pay(client, key):
+    return client.post('/process_payment', data={'idempotency_key': key, 'payment_method': 'UPI'})
+
+def test_double_submit_and_back_button_return_the_same_pass(app, student_client):
+    key = start_purchase(app, student_client)
+    before = row_counts(app)
+
+    first = pay(student_client, key)
+    assert first.status_code == 302 and '/pass/' in first.location
+    with student_client.session_transaction() as session:
+        assert 'pass_data' not in session  # What the back button resubmits into
+    second = pay(student_client, key)
+
+    assert second.location == first.location
+    passes, payments = row_counts(app)
+    assert (passes, payments) == (before[0] + 1, before[1] + 1)
+
+def test_key_not_matching_the_session_is_rejected(app, student_client):
+    start_purchase(app, student_client)
+    before = row_counts(app)
+
+    response = pay(student_client, 'not-the-issued-key')
+    assert response.location.endswith('/create_pass')
+    assert row_counts(app) == before
+
+def test_another_users_key_does_not_return_their_pass(app, scale_data, student_client):
+    from app_complete import User
+
+    key = start_purchase(app, student_client)
+    owner_pass = pay(student_client, key).location
+    with app.app_context():
+        other_id = User.query.filter(User.role == 'student', User.id != scale_data.student_id).first().id
+    other = logged_in_client(app, other_id, 'student')
+    start_purchase(app, other)
+    before = row_counts(app)
+
+    response = pay(other, key)
+    assert response.location.endswith('/create_pass') and response.location != owner_pass
+    assert row_counts(app) == before
+
+def test_lost_race_resolves_to_the_existing_pass(app, student_client, monkeypatch):
+    import app_complete
+
+    key = start_purchase(app, student_client)
+    first = pay(student_client, key).location
+
+    # A second request that passed the key check before the first one committed
+    start_purchase(app, student_client)
+    with student_client.session_transaction() as session:
+        session['pass_data'] = dict(session['pass_data'], idempotency_key=key)
+    real_find = app_complete.find_idempotent_payment
+    calls = []
+
+    def find_after_commit(idempotency_key):
+        calls.append(idempotency_key)
+        return real_find(idempotency_key) if len(calls) > 1 else None
+
+    monkeypatch.setattr(app_complete, 'find_idempotent_payment', find_after_commit)
+    before = row_counts(app)
+
+    response = pay(student_client, key)
+    assert len(calls) == 2  # Pre-check missed, then the IntegrityError path looked it up
+    assert response.location == first
+    assert row_counts(app) == before
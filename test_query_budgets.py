@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Query-count budgets for the heavy pages and the expiry alert job.
+Budgets are per request and independent of the data size; a lazy load in a
+loop (N+1) exceeds them by hundreds against the seeded scale data.
+"""
+
+import contextlib
+import io
+
+import pytest
+
+# (client fixture, path, maximum SQL statements)
+PAGE_BUDGETS = [
+    ('student_client', '/dashboard', 5),
+    ('admin_client', '/admin', 6),
+    ('admin_client', '/admin/users', 3),
+    ('admin_client', '/admin/payments', 2),
+    ('admin_client', '/admin/bulk_print?status=Pending', 4),
+]
+
+# send_expiry_alerts: reads per run, plus one INSERT per email/SMS log
+EXPIRY_ALERTS_READ_BUDGET = 6
+
+def describe(statements):
+    return '\n'.join(f"  {statement.splitlines()[0][:120]}" for statement in statements)
+
+@pytest.mark.parametrize('client_fixture, path, budget', PAGE_BUDGETS)
+def test_page_query_budget(request, count_queries, client_fixture, path, budget):
+    client = request.getfixturevalue(client_fixture)
+    with count_queries() as statements:
+        response = client.get(path)
+
+    assert response.status_code == 200
+    assert len(statements) <= budget, (
+        f"{path} ran {len(statements)} SQL statements (budget {budget}):\n{describe(statements)}")
+
+def test_expiry_alerts_query_budget(app, count_queries):
+    from app_complete import NotificationLog, send_expiry_alerts
+
+    with app.app_context():
+        logs_before = NotificationLog.query.count()
+    with count_queries() as statements, contextlib.redirect_stdout(io.StringIO()):
+        send_expiry_alerts()
+    with app.app_context():
+        logs_written = NotificationLog.query.count() - logs_before
+
+    reads = [statement for statement in statements if not statement.lstrip().upper().startswith('INSERT')]
+    assert logs_written > 0, "the seeded data should have passes due for an alert"
+    assert len(statements) - len(reads) <= logs_written
+    assert len(reads) <= EXPIRY_ALERTS_READ_BUDGET, (
+        f"send_expiry_alerts ran {len(reads)} reads (budget {EXPIRY_ALERTS_READ_BUDGET}):\n{describe(reads)}")
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Tests for the development-mode SQL detector
+"""
+
+import sqlite3
+
+from query_debug import QueryTracker, explain_query_plan, query_shape
+
+def test_query_shape_folds_in_lists():
+    assert query_shape("SELECT id\n  FROM pass WHERE id IN (?, ?, ?)") == "SELECT id FROM pass WHERE id IN (?...)"
+    assert query_shape("SELECT id FROM pass WHERE id IN (?)") == "SELECT id FROM pass WHERE id IN (?...)"
+
+def test_tracker_flags_repeated_shapes_and_slow_queries():
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE user (id INTEGER PRIMARY KEY, name TEXT)')
+    tracker = QueryTracker(slow_ms=50, repeat_threshold=3)
+
+    for user_id in range(4):
+        tracker.record(connection, 'SELECT name FROM user WHERE id = ?', (user_id,), 0.001)
+    tracker.record(connection, 'SELECT count(*) FROM user', (), 0.2)
+
+    assert tracker.repeated() == [('SELECT name FROM user WHERE id = ?', 4)]
+    assert tracker.report('admin_users') == 'queries=5; time_ms=204.0; repeated=1; slow=1'
+
+def test_explain_query_plan_only_for_selects():
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE user (id INTEGER PRIMARY KEY, name TEXT)')
+
+    plan = explain_query_plan(connection, 'SELECT name FROM user WHERE id = ?', (1,))
+    assert plan and 'user' in plan[0]
+    assert explain_query_plan(connection, 'DELETE FROM user', ()) == []
+
+def test_summary_header_when_enabled(app, admin_client, monkeypatch):
+    monkeypatch.setitem(app.config, 'QUERY_DEBUG', True)
+    response = admin_client.get('/admin/payments')
+    assert response.headers['X-Query-Debug'].startswith('queries=2;')
+
+    monkeypatch.setitem(app.config, 'QUERY_DEBUG', False)
+    assert 'X-Query-Debug' not in admin_client.get('/admin/payments').headers
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for compact revocation lists and their delta sync
+"""
+
+from datetime import date, timedelta
+
+from revocation import apply_delta, contains, decode_ids, diff, encode_ids, from_text, to_text
+
+def test_encoding_round_trips_compactly():
+    ids = [3, 4, 5, 130, 131, 20000, 2 ** 40]
+
+    assert decode_ids(encode_ids(ids)) == ids
+    assert from_text(to_text(ids)) == ids
+    assert from_text(to_text([])) == []
+    # Dense ids cost one byte each
+    assert len(encode_ids(range(1000, 2000))) == 2 + 999
+
+def test_delta_brings_device_list_up_to_date():
+    old, new = [1, 5, 9, 12], [1, 9, 12, 40, 41]
+    added, removed = diff(old, new)
+
+    assert (added, removed) == ([40, 41], [5])
+    assert apply_delta(old, added, removed) == new
+    assert contains(new, 40) and not contains(new, 5) and not contains([], 1)
+
+def test_rejected_pass_is_synced_and_fails_verification(app, admin_client, monkeypatch):
+    import app_complete
+    from app_complete import Pass, get_pass_signer
+
+    monkeypatch.setenv('VERIFY_TOKEN', 'scanner-token')
+    headers = {'Authorization': 'Bearer scanner-token'}
+    client = app.test_client()
+    with app.app_context():
+        bus_pass = Pass.query.filter(Pass.status == 'Approved', Pass.expiry_date >= date.today()).first()
+        pass_id = bus_pass.id
+        payload = get_pass_signer().sign(pass_id, 'BP1', bus_pass.expiry_date, 'Approved')
+
+    full = client.get('/api/revocations', headers=headers).get_json()
+    device_ids = from_text(full['ids'])
+    assert len(device_ids) == full['count'] > 0
+    assert pass_id not in device_ids
+    assert client.post('/api/passes/verify', json={'payloads': [payload]},
+                       headers=headers).get_json()['results'][0]['reason'] == 'ok'
+
+    # Publishing leaves worker caches alone; verify notices the new version itself
+    admin_client.get(f'/admin/reject_pass/{pass_id}')
+
+    delta = client.get(f"/api/revocations?since={full['version']}", headers=headers).get_json()
+    assert delta['version'] == full['version'] + 1
+    assert (from_text(delta['added']), from_text(delta['removed'])) == ([pass_id], [])
+    device_ids = apply_delta(device_ids, from_text(delta['added']), from_text(delta['removed']))
+    assert contains(device_ids, pass_id) and len(device_ids) == delta['count']
+
+    current = client.get(f"/api/revocations?since={delta['version']}", headers=headers).get_json()
+    assert (current['added'], current['removed']) == ('', '')
+    assert 'ids' in client.get('/api/revocations?since=999999', headers=headers).get_json()
+    # Skip the wait for the worker's next version check
+    monkeypatch.setattr(app_complete, 'REVOCATION_VERSION_CHECK', timedelta(0))
+    assert client.post('/api/passes/verify', json={'payloads': [payload]},
+                       headers=headers).get_json()['results'][0]['reason'] == 'revoked'
+    assert client.get('/api/revocations').status_code == 403
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for route line simplification and the route GeoJSON endpoint
+"""
+
+import gzip
+import json
+
+def test_simplify_keeps_endpoints_and_drops_collinear_points():
+    from app_complete import simplify_line
+
+    assert simplify_line([[0, 0], [1, 1], [2, 2], [3, 3]], 0.001) == [[0, 0], [3, 3]]
+    # A corner farther than the tolerance survives, a small wobble does not
+    line = [[0, 0], [1, 0.0001], [2, 0], [2, 2]]
+    assert simplify_line(line, 0.001) == [[0, 0], [2, 0], [2, 2]]
+
+def test_simplify_short_lines_unchanged():
+    from app_complete import simplify_line
+
+    assert simplify_line([], 0.001) == []
+    assert simplify_line([[1, 2]], 0.001) == [[1, 2]]
+    assert simplify_line([[1, 2], [1, 2]], 0.001) == [[1, 2], [1, 2]]
+    # A loop back to the start is measured from the start point
+    assert simplify_line([[0, 0], [1, 1], [0, 0]], 0.001) == [[0, 0], [1, 1], [0, 0]]
+
+def test_low_detail_differs_from_full(student_client):
+    full = student_client.get('/api/routes.geojson').get_json()
+    low = student_client.get('/api/routes.geojson?detail=low').get_json()
+
+    assert len(full['features']) == len(low['features']) > 0
+    assert 'stops' in full['features'][0]['properties']
+    assert 'stops' not in low['features'][0]['properties']
+    assert sum(len(feature['geometry']['coordinates']) for feature in low['features']) < \
+        sum(len(feature['geometry']['coordinates']) for feature in full['features'])
+
+def test_if_none_match_returns_304_per_encoding(student_client):
+    identity = student_client.get('/api/routes.geojson')
+    gzipped = student_client.get('/api/routes.geojson', headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(gzipped.data)) == identity.get_json()
+    assert gzipped.headers['ETag'] != identity.headers['ETag']
+
+    response = student_client.get('/api/routes.geojson', headers={'If-None-Match': identity.headers['ETag']})
+    assert response.status_code == 304
+    response = student_client.get('/api/routes.geojson', headers={'If-None-Match': gzipped.headers['ETag'],
+                                                                   'Accept-Encoding': 'gzip'})
+    assert response.status_code == 304
+    # The identity ETag does not validate the gzipped variant
+    response = student_client.get('/api/routes.geojson', headers={'If-None-Match': identity.headers['ETag'],
+                                                                   'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+
+def test_route_edit_changes_etag(app, student_client):
+    from app_complete import Route, db
+
+    etag = student_client.get('/api/routes.geojson').headers['ETag']
+    with app.app_context():
+        route = Route.query.order_by(Route.id).first()
+        route_id, stops = route.id, route.get_stops()
+        route.set_stops([dict(stops[0], lat=stops[0]['lat'] + 0.01)] + stops[1:])
+        db.session.commit()
+    try:
+        response = student_client.get('/api/routes.geojson', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+    finally:
+        with app.app_context():
+            db.session.get(Route, route_id).set_stops(stops)
+            db.session.commit()
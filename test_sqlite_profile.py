@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite engine profile and the DB_POOL_* engine options
+"""
+
+import pytest
+from sqlalchemy import create_engine
+
+POOL_VARS = ('DB_POOL_SIZE', 'DB_MAX_OVERFLOW', 'DB_POOL_TIMEOUT', 'DB_POOL_RECYCLE', 'DB_POOL_PRE_PING')
+
+def read_pragmas(connection, names):
+    return {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names}
+
+def test_profile_applies_to_app_connections(app):
+    from app_complete import db
+
+    with app.app_context(), db.engine.connect() as connection:
+        assert read_pragmas(connection, ('busy_timeout', 'foreign_keys', 'synchronous', 'cache_size', 'temp_store')) == \
+            {'busy_timeout': 5000, 'foreign_keys': 1, 'synchronous': 1, 'cache_size': -20000, 'temp_store': 2}
+
+def test_profile_applies_to_new_file_connection(app, tmp_path):
+    # The in-memory test database has no journal file or mmap, so check those on a file
+    engine = create_engine(f"sqlite:///{tmp_path / 'passflow.db'}", **app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+    try:
+        with engine.connect() as connection:
+            assert read_pragmas(connection, ('journal_mode', 'mmap_size', 'busy_timeout', 'foreign_keys')) == \
+                {'journal_mode': 'wal', 'mmap_size': 268435456, 'busy_timeout': 5000, 'foreign_keys': 1}
+    finally:
+        engine.dispose()
+
+def test_default_profile_and_overrides(app, tmp_path, monkeypatch):
+    from app_complete import sqlite_pragmas_from_env
+
+    monkeypatch.setenv('SQLITE_PROFILE', 'default')
+    monkeypatch.setenv('SQLITE_BUSY_TIMEOUT', '10000')
+    assert sqlite_pragmas_from_env() == {'busy_timeout': '10000'}
+
+    monkeypatch.setitem(app.config, 'SQLITE_PRAGMAS', sqlite_pragmas_from_env())
+    engine = create_engine(f"sqlite:///{tmp_path / 'passflow.db'}")
+    try:
+        with engine.connect() as connection:
+            assert read_pragmas(connection, ('journal_mode', 'busy_timeout')) == \
+                {'journal_mode': 'delete', 'busy_timeout': 10000}
+    finally:
+        engine.dispose()
+
+def test_empty_override_skips_pragma(monkeypatch):
+    from app_complete import sqlite_pragmas_from_env
+
+    monkeypatch.delenv('SQLITE_PROFILE', raising=False)
+    monkeypatch.setenv('SQLITE_MMAP_SIZE', '')
+    pragmas = sqlite_pragmas_from_env()
+    assert 'mmap_size' not in pragmas
+    assert pragmas['journal_mode'] == 'WAL'
+
+    monkeypatch.setenv('SQLITE_PROFILE', 'fast')
+    with pytest.raises(ValueError):
+        sqlite_pragmas_from_env()
+
+def test_engine_options_from_env(monkeypatch):
+    from app_complete import engine_options_from_env
+
+    for name in POOL_VARS:
+        monkeypatch.delenv(name, raising=False)
+    assert engine_options_from_env() == {}
+
+    for name, value in zip(POOL_VARS, ('10', '5', '30', '3600', 'yes')):
+        monkeypatch.setenv(name, value)
+    assert engine_options_from_env() == {'pool_size': 10, 'max_overflow': 5, 'pool_timeout': 30,
+                                         'pool_recycle': 3600, 'pool_pre_ping': True}
+
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'off')
+    monkeypatch.setenv('DB_POOL_SIZE', '')
+    options = engine_options_from_env()
+    assert options['pool_pre_ping'] is False
+    assert 'pool_size' not in options
+
+def test_database_url_selects_engine(app):
+    from app_complete import db
+
+    # conftest sets DATABASE_URL before app_complete is imported
+    assert app.config['SQLALCHEMY_DATABASE_URI'] == 'sqlite://'
+    with app.app_context():
+        assert str(db.engine.url) == 'sqlite://'
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the login/registration token-bucket limiter
+"""
+
+from throttle import TokenBucketLimiter
+
+def test_bucket_allows_burst_then_refills(tmp_path):
+    limiter = TokenBucketLimiter(str(tmp_path / 'throttle.db'))
+    limit = [('login:ip:10.0.0.1', 3, 1.0)]  # burst 3, one token per second
+
+    assert [limiter.take(limit, now=100)[0] for _ in range(3)] == [None, None, None]
+    key, retry_after = limiter.take(limit, now=100)
+    assert key == 'login:ip:10.0.0.1' and retry_after == 1.0
+
+    assert limiter.take(limit, now=101.5) == (None, 0)
+    assert limiter.take(limit, now=101.5)[0] == 'login:ip:10.0.0.1'
+
+def test_state_is_shared_between_limiters(tmp_path):
+    path = str(tmp_path / 'throttle.db')
+    first, second = TokenBucketLimiter(path), TokenBucketLimiter(path)
+    limit = [('register:ip:10.0.0.2', 2, 0.01)]
+
+    assert first.take(limit, now=0)[0] is None
+    assert second.take(limit, now=0)[0] is None
+    assert first.take(limit, now=0)[0] == 'register:ip:10.0.0.2'
+
+def test_empty_bucket_takes_nothing_from_the_others(tmp_path):
+    limiter = TokenBucketLimiter(str(tmp_path / 'throttle.db'))
+    ip, account = ('login:ip:10.0.0.3', 5, 0.01), ('login:account:a@example.com', 1, 0.01)
+
+    assert limiter.take([ip, account], now=0)[0] is None
+    assert limiter.take([ip, account], now=0)[0] == 'login:account:a@example.com'
+    # The rejected attempt did not spend an IP token: 4 of 5 remain
+    other = ('login:account:b@example.com', 5, 0.01)
+    assert [limiter.take([ip, other], now=0)[0] for _ in range(5)] == [None] * 4 + ['login:ip:10.0.0.3']
+
+def test_login_is_rejected_before_hashing(app, scale_data):
+    from metrics import OPERATION_LATENCY, THROTTLED
+
+    client = app.test_client()
+    form = {'email': 'admin@example.com', 'password': 'wrong-password'}
+    hashes_before = OPERATION_LATENCY.count('bcrypt_check')
+    responses = [client.post('/login', data=form, environ_base={'REMOTE_ADDR': '10.9.9.9'}) for _ in range(7)]
+
+    assert [response.status_code for response in responses] == [200] * 5 + [429] * 2
+    assert 0 < int(responses[-1].headers['Retry-After']) <= 60
+    assert OPERATION_LATENCY.count('bcrypt_check') - hashes_before == 5
+    assert THROTTLED.value('login', 'account') >= 2
+
+def test_ip_buckets_are_separate(app, scale_data):
+    from app_complete import THROTTLE_LIMITS
+
+    client = app.test_client()
+    burst = THROTTLE_LIMITS['register']['ip'][0]
+    statuses = [client.post('/register', data={}, environ_base={'REMOTE_ADDR': '10.8.0.1'}).status_code
+                for _ in range(burst + 1)]
+    assert 429 not in statuses[:-1] and statuses[-1] == 429
+
+    assert client.post('/register', data={}, environ_base={'REMOTE_ADDR': '10.8.0.2'}).status_code != 429
+
+def test_trusted_proxy_supplies_the_client_address(app, scale_data, monkeypatch):
+    import app_complete
+    from app_complete import THROTTLE_LIMITS
+
+    monkeypatch.setattr(app, 'wsgi_app', app.wsgi_app)
+    app_complete.trust_proxies(1)
+    client = app.test_client()
+    burst = THROTTLE_LIMITS['register']['ip'][0]
+    router = {'REMOTE_ADDR': '10.7.0.1'}
+
+    def register(client_ip):
+        return client.post('/register', data={}, environ_base=router,
+                           headers={'X-Forwarded-For': client_ip}).status_code
+
+    assert [register('203.0.113.5') for _ in range(burst + 1)][-1] == 429
+    assert register('203.0.113.6') != 429
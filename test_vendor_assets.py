@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for vendored, fingerprinted assets and their precompressed serving
+"""
+
+import gzip
+
+import vendor_assets
+from vendor_assets import ASSETS, SUPPORT_FILES, local_copies, missing_assets, vendor_assets as vendor
+
+def test_vendored_assets_are_fingerprinted_and_served_precompressed(app, tmp_path, monkeypatch):
+    import app_complete
+
+    source = tmp_path / 'source'
+    for name in list(ASSETS) + list(SUPPORT_FILES):
+        (source / name).parent.mkdir(parents=True, exist_ok=True)
+        (source / name).write_bytes(f'/* {name} */\n'.encode('utf-8') * 100)
+    vendor_dir = tmp_path / 'vendor'
+    manifest = vendor(str(vendor_dir), fetch=local_copies(str(source)))
+
+    monkeypatch.setattr(vendor_assets, 'VENDOR_DIR', str(vendor_dir))
+    monkeypatch.setattr(app_complete, '_asset_manifest', manifest)
+    with app.test_request_context():
+        url = app_complete.asset_url('leaflet.js')
+    assert url == f"/assets/{manifest['leaflet.js']}" and manifest['leaflet.js'] != 'leaflet.js'
+
+    client = app.test_client()
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert gzip.decompress(response.get_data()) == (source / 'leaflet.js').read_bytes()
+
+    plain = client.get('/assets/images/marker-icon.png', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers and 'immutable' not in plain.headers['Cache-Control']
+
+def test_missing_assets_lists_unvendored_files(tmp_path):
+    vendor_dir = tmp_path / 'vendor'
+    assert missing_assets(str(vendor_dir)) == list(ASSETS) + list(SUPPORT_FILES)
+
+    source = tmp_path / 'source'
+    for name in list(ASSETS) + list(SUPPORT_FILES):
+        (source / name).parent.mkdir(parents=True, exist_ok=True)
+        (source / name).write_bytes(name.encode('utf-8'))
+    manifest = vendor(str(vendor_dir), fetch=local_copies(str(source)))
+    assert missing_assets(str(vendor_dir)) == []
+
+    (vendor_dir / manifest['leaflet.js']).unlink()
+    (vendor_dir / 'images' / 'marker-icon.png').unlink()
+    assert missing_assets(str(vendor_dir)) == ['leaflet.js', 'images/marker-icon.png']
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate limiter for PassFlow
+Bucket state lives in a small SQLite file next to the app, so every
+gunicorn worker on the host shares it. A check is one short write
+transaction, cheap next to the bcrypt hash it protects.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucket (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    full_at REAL NOT NULL  -- when the bucket will have refilled; rows past this are pruned
+)
+"""
+
+# Delete refilled buckets roughly once per this many checks
+PRUNE_EVERY = 1000
+
+class TokenBucketLimiter:
+    """Check-and-take across several buckets at once.
+
+    A limit is (key, burst, per_second): the bucket holds at most ``burst``
+    tokens and refills at ``per_second``. A request takes one token from
+    every bucket, or none if any of them is empty.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._checks = 0
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            # One connection per thread, and none inherited across fork
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(SCHEMA)
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    def take(self, limits, now=None):
+        """Return (None, 0) if allowed, else (key of the first empty bucket, seconds until it has a token)"""
+        now = time.time() if now is None else now
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            levels = []
+            for key, burst, per_second in limits:
+                row = connection.execute('SELECT tokens, updated_at FROM bucket WHERE key = ?', (key,)).fetchone()
+                tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * per_second)
+                if tokens < 1:
+                    connection.execute('COMMIT')
+                    return key, (1 - tokens) / per_second
+                levels.append((key, tokens - 1, now + (burst - tokens + 1) / per_second))
+
+            connection.executemany(
+                'INSERT OR REPLACE INTO bucket (key, tokens, updated_at, full_at) VALUES (?, ?, ?, ?)',
+                [(key, tokens, now, full_at) for key, tokens, full_at in levels])
+
+            self._checks += 1
+            if self._checks % PRUNE_EVERY == 0:
+                connection.execute('DELETE FROM bucket WHERE full_at < ?', (now,))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return None, 0
+
+    def reset(self):
+        """Forget every bucket"""
+        self._connection().execute('DELETE FROM bucket')
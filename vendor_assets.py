@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Vendor the third-party CSS/JS used by base.html into static/vendor
+Each asset is stored under a content-hash filename with precompressed
+.gz (and .br, when the brotli package is installed) variants, and
+recorded in static/vendor/manifest.json for the asset_url template helper
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import urllib.request
+
+VENDOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'vendor')
+MANIFEST_FILE = 'manifest.json'
+
+# Logical name -> pinned CDN URL; base.html falls back to these until vendored
+ASSETS = {
+    'bootstrap.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    'bootstrap-icons.css': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.0/font/bootstrap-icons.css',
+    'leaflet.css': 'https://unpkg.com/leaflet@1.9.4/dist/leaflet.css',
+    'bootstrap.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+    'leaflet.js': 'https://unpkg.com/leaflet@1.9.4/dist/leaflet.js'
+}
+
+# Files referenced by relative url() from the stylesheets above; they keep
+# their paths so the references still resolve next to the fingerprinted CSS
+SUPPORT_FILES = {
+    'fonts/bootstrap-icons.woff2': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.0/font/fonts/bootstrap-icons.woff2',
+    'fonts/bootstrap-icons.woff': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.10.0/font/fonts/bootstrap-icons.woff',
+    'images/layers.png': 'https://unpkg.com/leaflet@1.9.4/dist/images/layers.png',
+    'images/layers-2x.png': 'https://unpkg.com/leaflet@1.9.4/dist/images/layers-2x.png',
+    'images/marker-icon.png': 'https://unpkg.com/leaflet@1.9.4/dist/images/marker-icon.png',
+    'images/marker-icon-2x.png': 'https://unpkg.com/leaflet@1.9.4/dist/images/marker-icon-2x.png',
+    'images/marker-shadow.png': 'https://unpkg.com/leaflet@1.9.4/dist/images/marker-shadow.png'
+}
+
+# Text assets worth precompressing (fonts and PNGs are already compressed)
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js')
+
+def fingerprinted_name(name, content):
+    """Return e.g. 'leaflet.3f2a9c1b7d4e.css' for 'leaflet.css'"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+def write_compressed_variants(path, content):
+    """Write path.gz, and path.br when brotli is available"""
+    write_file(path + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return
+    write_file(path + '.br', brotli.compress(content, quality=11))
+
+def load_manifest(vendor_dir=VENDOR_DIR):
+    """Return {logical name: fingerprinted filename}, or {} if nothing is vendored"""
+    try:
+        with open(os.path.join(vendor_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def missing_assets(vendor_dir=VENDOR_DIR):
+    """Return the logical names of assets and support files not vendored in vendor_dir"""
+    manifest = load_manifest(vendor_dir)
+    missing = [name for name in ASSETS
+               if name not in manifest or not os.path.isfile(os.path.join(vendor_dir, manifest[name]))]
+    missing.extend(name for name in SUPPORT_FILES if not os.path.isfile(os.path.join(vendor_dir, name)))
+    return missing
+
+def download(url):
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return response.read()
+
+def local_copies(source_dir):
+    """Fetch function reading each file from source_dir by its logical name
+    (e.g. bootstrap.css, fonts/bootstrap-icons.woff2), for hosts without CDN access"""
+    names = {url: name for name, url in list(ASSETS.items()) + list(SUPPORT_FILES.items())}
+
+    def fetch(url):
+        with open(os.path.join(source_dir, names[url]), 'rb') as f:
+            return f.read()
+    return fetch
+
+def vendor_assets(vendor_dir=VENDOR_DIR, fetch=download):
+    """Download every asset and support file and rewrite the manifest"""
+    manifest = {}
+    for name, url in ASSETS.items():
+        content = fetch(url)
+        filename = fingerprinted_name(name, content)
+        path = os.path.join(vendor_dir, filename)
+        write_file(path, content)
+        if filename.endswith(COMPRESSIBLE_EXTENSIONS):
+            write_compressed_variants(path, content)
+        manifest[name] = filename
+        print(f"✓ {name} -> {filename} ({len(content) // 1024} KB)")
+
+    for name, url in SUPPORT_FILES.items():
+        write_file(os.path.join(vendor_dir, name), fetch(url))
+        print(f"✓ {name}")
+
+    # Remove fingerprinted files from earlier runs
+    current = set(manifest.values())
+    for filename in os.listdir(vendor_dir):
+        base = filename[:-3] if filename.endswith(('.gz', '.br')) else filename
+        if base not in current and base != MANIFEST_FILE and os.path.isfile(os.path.join(vendor_dir, filename)):
+            os.remove(os.path.join(vendor_dir, filename))
+
+    write_file(os.path.join(vendor_dir, MANIFEST_FILE), json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Download CDN assets into static/vendor with content-hash names')
+    parser.add_argument('--from-dir', metavar='DIR',
+                        help='copy the pinned files from DIR (named like bootstrap.css, fonts/...) instead of downloading')
+    parser.add_argument('--check', action='store_true',
+                        help='only report whether every asset is vendored; exit 1 if any is missing')
+    args = parser.parse_args()
+    if args.check:
+        missing = missing_assets()
+        if missing:
+            print(f"❌ Not vendored, served from the CDN: {', '.join(missing)}")
+            raise SystemExit(1)
+        print("✓ All assets vendored")
+        raise SystemExit(0)
+    print("Vendoring static assets...")
+    vendor_assets(fetch=local_copies(args.from_dir) if args.from_dir else download)
+    print("\n✅ Assets vendored. Commit static/vendor to serve them from PassFlow.")
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for PassFlow
+Run with gunicorn --preload wsgi:app so templates are compiled once in the
+master process and shared by every forked worker
+"""
+
+from app_complete import create_app
+
+app = create_app()